@@ -1,139 +1,106 @@
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
-import random
-import csv
 
-def generar_mapa_fractal(tamaño, escala_inicial):
-    mapa = np.zeros((tamaño, tamaño))
-
-    valor_inicial = random.uniform(0.4, 0.6)
-    mapa[0, 0] = mapa[0, -1] = mapa[-1, 0] = mapa[-1, -1] = valor_inicial
-
-    paso = tamaño - 1
-    escala = escala_inicial
-
-    while paso > 1:
-        mitad = paso // 2
-
-        # Paso "diamante"
-        for x in range(0, tamaño - 1, paso):
-            for y in range(0, tamaño - 1, paso):
-                centro_x = x + mitad
-                centro_y = y + mitad
-                promedio = (mapa[x, y] + mapa[x+paso, y] + mapa[x, y+paso] + mapa[x+paso, y+paso]) / 4.0
-                mapa[centro_x, centro_y] = promedio + random.uniform(-escala, escala)
-
-        # Paso "cuadrado"
-        for x in range(0, tamaño, mitad):
-            for y in range((x + mitad) % paso, tamaño, paso):
-                total = 0
-                contador = 0
-
-                for dx, dy in [(-mitad, 0), (mitad, 0), (0, -mitad), (0, mitad)]:
-                    nx = x + dx
-                    ny = y + dy
-                    if 0 <= nx < tamaño and 0 <= ny < tamaño:
-                        total += mapa[nx, ny]
-                        contador += 1
-
-                promedio = total / contador if contador > 0 else 0
-                mapa[x, y] = promedio + random.uniform(-escala, escala)
-
-        paso = mitad
-        escala = escala / 2.0
-
-    return np.clip(mapa, 0, 1)
-
-def aplicar_mascara_geologica_simple(mapa):
-    tamaño = mapa.shape[0]
-
-    x = np.linspace(-1, 1, tamaño)
-    y = np.linspace(-1, 1, tamaño)
-    X, Y = np.meshgrid(x, y)
-
-    centro = np.exp(-(X**2 + Y**2) / 0.5)
-    fractura = np.exp(-((X + Y)**2) / 0.2)
-
-    mascara_total = 0.7 * centro + 0.3 * fractura
-
-    mapa_modificado = mapa * mascara_total
-
-    return np.clip(mapa_modificado, 0, 1)
+# generadorHeatMap vive en ./main (no se importa como paquete: chocaría con este main.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main"))
+from generadorHeatMap import cargar_heatmap
+from metricas import RegistroMetricas
 
 # Parámetros
 TAMANO = 7
 SIZE = 2 ** TAMANO + 1
-MAPA = generar_mapa_fractal(SIZE, 0.5)
-MAPA = aplicar_mascara_geologica_simple(MAPA)
+# Mapa fractal con máscara geológica: se genera una vez, queda en la caché
+# de main/heatmaps (como <hash>.npy, ver manifiesto.py) y el runner lo
+# encuentra por los nombres "litio_geologico" y "litio_geologico_fractal"
+MAPA = cargar_heatmap("litio_geologico", SIZE, tipo="fractal", escala_inicial=0.5, mascara=True)
 N_POZOS = 10
 POBLACION = 50
 GENERACIONES = 100
 PROB_CROSSOVER = 0.75
 PROB_MUTACION = 0.05
 
-def guardar_resultados_csv(nombre_archivo, generacion, min_fit, max_fit, prom_fit, mejor_ind):
-    modo = 'a' if generacion > 0 else 'w'
-    with open(nombre_archivo, modo, newline='') as archivo:
-        writer = csv.writer(archivo)
-        if generacion == 0:
-            writer.writerow(['Generación', 'Fitness Mínimo', 'Fitness Máximo', 'Fitness Promedio', 'Mejor Individuo'])
-        writer.writerow([
-            generacion,
-            round(min_fit, 4),
-            round(max_fit, 4),
-            round(prom_fit, 4),
-            str(mejor_ind)
-        ])
-
-def crear_individuo():
-    return [ (random.randint(0, SIZE-1), random.randint(0, SIZE-1)) for _ in range(N_POZOS) ]
-
-def fitness(ind):
-    return sum([MAPA[x][y] for x,y in ind])
+# Columnas de resultados_generaciones.csv: las de siempre y, al final,
+# las estadísticas nuevas
+COLUMNAS_CSV = (
+    ("generacion",    "Generación"),
+    ("min",           "Fitness Mínimo"),
+    ("max",           "Fitness Máximo"),
+    ("media",         "Fitness Promedio"),
+    ("mejor",         "Mejor Individuo"),
+    ("std",           "Fitness Desvío"),
+    ("diversidad",    "Diversidad"),
+    ("celdas_unicas", "Celdas Únicas"),
+)
+
+# =========================
+# GA sobre arrays
+# =========================
+# La población es un array (POBLACION, N_POZOS, 2) de coordenadas enteras:
+# el fitness se calcula una sola vez por generación indexando MAPA, y el
+# torneo, el cruce en un punto y la mutación se aplican a toda la
+# población a la vez.
+rng = np.random.default_rng()
+
+def crear_poblacion(n):
+    return rng.integers(0, SIZE, size=(n, N_POZOS, 2))
+
+def fitness(poblacion):
+    """Fitness de cada individuo: suma de MAPA en sus pozos."""
+    return MAPA[poblacion[..., 0], poblacion[..., 1]].sum(axis=-1)
+
+def seleccion_torneo(fitness_vals, n, k=3):
+    """
+    Índices de n ganadores de torneos de k participantes distintos; ante
+    empates gana el primero sorteado, como max() sobre la muestra.
+    """
+    if len(fitness_vals) < k:
+        # como random.sample: sin k individuos distintos no hay torneo
+        raise ValueError(f"Población de {len(fitness_vals)} para torneos de {k}")
+    participantes = rng.integers(0, len(fitness_vals), size=(n, k))
+    # volver a sortear los torneos con participantes repetidos
+    repetidos = (np.diff(np.sort(participantes, axis=1), axis=1) == 0).any(axis=1)
+    while repetidos.any():
+        participantes[repetidos] = rng.integers(0, len(fitness_vals), size=(repetidos.sum(), k))
+        repetidos = (np.diff(np.sort(participantes, axis=1), axis=1) == 0).any(axis=1)
+    ganador = np.argmax(fitness_vals[participantes], axis=1)
+    return participantes[np.arange(n), ganador]
 
 def cruce(p1, p2):
-    if random.random() < PROB_CROSSOVER:
-        corte = random.randint(1, N_POZOS-1)
-        return p1[:corte] + p2[corte:]
-    else:
-        return p1.copy()
-
-def mutar(ind):
-    nuevo = []
-    for gen in ind:
-        if random.random() < PROB_MUTACION:
-            nuevo.append((random.randint(0, SIZE-1), random.randint(0, SIZE-1)))
-        else:
-            nuevo.append(gen)
-    return nuevo
-
-def seleccion_torneo(poblacion, k=3):
-    participantes = random.sample(poblacion, k)
-    mejor = max(participantes, key=fitness)
-    return mejor
+    """Cruce en un punto con prob. PROB_CROSSOVER; si no, copia de p1."""
+    n = len(p1)
+    corte = rng.integers(1, N_POZOS, size=n)
+    corte[rng.random(n) >= PROB_CROSSOVER] = N_POZOS
+    de_p1 = np.arange(N_POZOS)[None, :] < corte[:, None]
+    return np.where(de_p1[..., None], p1, p2)
+
+def mutar(poblacion):
+    """Cada pozo se reemplaza por uno aleatorio con prob. PROB_MUTACION."""
+    muta = rng.random(poblacion.shape[:2]) < PROB_MUTACION
+    nuevos = rng.integers(0, SIZE, size=poblacion.shape)
+    return np.where(muta[..., None], nuevos, poblacion)
+
+def como_lista(ind):
+    return [tuple(p) for p in ind.tolist()]
 
 # Inicialización
-poblacion = [crear_individuo() for _ in range(POBLACION)]
-
-for gen in range(GENERACIONES):
-    poblacion = sorted(poblacion, key=fitness, reverse=True)
-
-    fitness_vals = [fitness(ind) for ind in poblacion]
-    max_fit = max(fitness_vals)
-    min_fit = min(fitness_vals)
-    prom_fit = sum(fitness_vals) / len(fitness_vals)
-    mejor_ind = poblacion[0]
-
-    guardar_resultados_csv("resultados_generaciones.csv", gen, min_fit, max_fit, prom_fit, mejor_ind)
-
-    # Evolución sin elitismo, con torneo
-    nueva = []
-    while len(nueva) < POBLACION:
-        padre1 = seleccion_torneo(poblacion)
-        padre2 = seleccion_torneo(poblacion)
-        hijo = mutar(cruce(padre1, padre2))
-        nueva.append(hijo)
-    poblacion = nueva
+poblacion = crear_poblacion(POBLACION)
+
+# las filas se escriben por lotes, no reabriendo el CSV en cada generación
+with RegistroMetricas("resultados_generaciones.csv", COLUMNAS_CSV, decimales=4) as registro:
+    for gen in range(GENERACIONES):
+        fitness_vals = fitness(poblacion)
+        orden = np.argsort(-fitness_vals, kind="stable")
+        poblacion, fitness_vals = poblacion[orden], fitness_vals[orden]
+
+        mejor_ind = como_lista(poblacion[0])
+        registro.agregar(gen, fitness_vals, poblacion, mejor=mejor_ind)
+
+        # Evolución sin elitismo, con torneo
+        padres1 = poblacion[seleccion_torneo(fitness_vals, POBLACION)]
+        padres2 = poblacion[seleccion_torneo(fitness_vals, POBLACION)]
+        poblacion = mutar(cruce(padres1, padres2))
 
 # Visualización
 plt.figure(figsize=(7,7))
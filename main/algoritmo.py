@@ -2,12 +2,16 @@ import random
 import math
 import numpy as np
 
+from espacial import vecinos_mas_cercanos, pares_cercanos
+from poblacion import Poblacion
+from perfil import fase, contar
+
 def generar_pozos_aleatorios(n_pozos, size, fitness_fn=None):
     """
     Genera n_pozos coordenadas únicas de forma aleatoria.
     Devuelve (pozos, poblacion), donde:
-      - pozos = [(x,y), ...]
-      - poblacion = [( (x,y), fitness ), ...]
+      - pozos = array (N,2) de coordenadas (vista de poblacion.coords)
+      - poblacion = Poblacion con su fitness (NaN si no hay fitness_fn)
     """
     if n_pozos > size * size:
         raise ValueError("Más pozos que celdas disponibles.")
@@ -18,14 +22,10 @@ def generar_pozos_aleatorios(n_pozos, size, fitness_fn=None):
                     random.randint(0, size - 1)))
     coords = list(coords)
 
-    # Si no hay fitness_fn, asumimos fitness = None
-    if fitness_fn:
-        poblacion = [(p, fitness_fn(p)) for p in coords]
-    else:
-        poblacion = [(p, None) for p in coords]
-
-    pozos = [p for p, _ in poblacion]
-    return pozos, poblacion
+    # Si no hay fitness_fn, el fitness queda sin evaluar (NaN)
+    fitness = [fitness_fn(p) for p in coords] if fitness_fn else None
+    poblacion = Poblacion(coords, fitness)
+    return poblacion.coords, poblacion
 
 
 def generar_pozos_equidistantes(num_pozos, grid_size, fitness_fn, distancia_min=None):
@@ -61,24 +61,212 @@ def generar_pozos_equidistantes(num_pozos, grid_size, fitness_fn, distancia_min=
     pozos = grid[:num_pozos]
 
     # calcular fitness
-    poblacion = [(p, fitness_fn(p)) for p in pozos]
+    poblacion = Poblacion(np.array(pozos, dtype=np.int64).reshape(-1, 2),
+                          [fitness_fn(p) for p in pozos])
 
-    return pozos, poblacion
+    return poblacion.coords, poblacion
 
 def distancia(p1, p2):
     """Distancia euclidiana entre dos puntos."""
     return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
 
 def seleccionar_poblacion(candidatos, puntos, elitismo=0, aleatorio=True):
-    candidatos_ordenados = sorted(candidatos, key=lambda x: x[1], reverse=True)
-    mejores = candidatos_ordenados[:elitismo] if elitismo > 0 else []
-    resto = candidatos_ordenados[elitismo:]
+    """
+    Élite de 'elitismo' individuos más el resto hasta 'puntos', por ruleta
+    con reposición (aleatorio) o por orden de fitness. Devuelve Poblacion.
+
+    La ruleta consume random.random() igual que random.choices, así que
+    con la misma semilla elige los mismos individuos.
+    """
+    ordenados = Poblacion.desde(candidatos).ordenada()
+    contar("seleccion.candidatos", len(ordenados))
+    n_elite = min(elitismo, len(ordenados)) if elitismo > 0 else 0
+    mejores = ordenados[:n_elite]
+    resto   = ordenados[elitismo:] if elitismo > 0 else ordenados
+    k = puntos - n_elite
     if aleatorio:
-        pesos = [max(f, 0.0001) for _, f in resto]
-        seleccionados_resto = random.choices(resto, weights=pesos, k=puntos - len(mejores))
+        if k <= 0:
+            return mejores
+        if len(resto) == 0:
+            raise IndexError("No quedan candidatos para completar la población.")
+        acum  = np.cumsum(np.maximum(resto.fitness, 0.0001))
+        total = acum[-1] + 0.0
+        u = np.array([random.random() for _ in range(k)]) * total
+        idx = np.minimum(np.searchsorted(acum, u, side="right"), len(resto) - 1)
+        return mejores + resto[idx]
+    return mejores + resto[:k]
+
+def muestrear_parejas_ruleta(fitness, rng, peso_fitness=1.0):
+    """
+    Elige una pareja por ruleta para cada individuo, sin repetirse a sí mismo.
+
+    Todos comparten una única tabla de pesos acumulados: para el individuo i
+    se sortea u en [0, total - w_i) y, si cae a partir del inicio de su propio
+    tramo, se desplaza por encima de él.
+    """
+    pesos = np.maximum(np.asarray(fitness, dtype=np.float64), 1e-6) ** peso_fitness
+    n = len(pesos)
+    if n < 2:
+        raise ValueError("Se necesitan al menos dos individuos para el cruce por ruleta.")
+
+    acum   = np.cumsum(pesos)
+    inicio = acum - pesos
+    u = rng.random(n) * (acum[-1] - pesos)
+    u = np.where(u >= inicio, u - inicio + acum, u)
+
+    idx = np.minimum(np.searchsorted(acum, u, side="right"), n - 1)
+    yo  = np.arange(n)
+    # salvaguarda ante redondeos en el último tramo
+    return np.where(idx == yo, (yo + 1) % n, idx)
+
+
+def muestrear_parejas_ruleta_dist(coords, fitness, rng, peso_fitness=1.0,
+                                  peso_distancia=1.0, vecindad=None, bloque=2048):
+    """
+    Elige una pareja por ruleta ponderada por fitness y cercanía para cada
+    individuo: peso(i, j) = fitness_j^peso_fitness * (1 / (1 + d_ij))^peso_distancia.
+
+    - vecindad: si se indica, solo se consideran parejas a distancia menor
+      que 'vecindad'; quien no tenga vecinos usa la ruleta completa.
+    - bloque:   filas de la matriz de pesos que se construyen a la vez.
+    """
+    pts   = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    pesos = np.maximum(np.asarray(fitness, dtype=np.float64), 1e-6) ** peso_fitness
+    n = len(pts)
+    if n < 2:
+        raise ValueError("Se necesitan al menos dos individuos para el cruce por ruleta.")
+
+    parejas = np.empty(n, dtype=np.int64)
+    u = rng.random(n)
+
+    filas = np.arange(n)
+    if vecindad is not None:
+        iq, ir, d = pares_cercanos(pts, pts, vecindad)
+        distinto = iq != ir
+        iq, ir, d = iq[distinto], ir[distinto], d[distinto]
+
+        w    = pesos[ir] * (1.0 / (1.0 + d)) ** peso_distancia
+        cnt  = np.bincount(iq, minlength=n)
+        fin  = np.cumsum(cnt)
+        acum = np.cumsum(w)
+        acum0 = np.concatenate(([0.0], acum))
+        desde = acum0[fin - cnt]
+        total = acum0[fin] - desde
+
+        con_vecinos = cnt > 0
+        obj = (desde + u * total)[con_vecinos]
+        idx = np.searchsorted(acum, obj, side="right")
+        # acotar al tramo propio de cada fila
+        idx = np.clip(idx, (fin - cnt)[con_vecinos], fin[con_vecinos] - 1)
+        parejas[con_vecinos] = ir[idx]
+        filas = filas[~con_vecinos]
+
+    # ruleta completa por bloques de filas
+    for a in range(0, len(filas), bloque):
+        f  = filas[a:a + bloque]
+        dx = pts[f, 0][:, None] - pts[None, :, 0]
+        dy = pts[f, 1][:, None] - pts[None, :, 1]
+        w  = pesos[None, :] * (1.0 / (1.0 + np.sqrt(dx * dx + dy * dy))) ** peso_distancia
+        contar("distancias", w.size)
+        w[np.arange(len(f)), f] = 0.0
+
+        acum = np.cumsum(w, axis=1)
+        obj  = u[f] * acum[:, -1]
+        idx  = np.minimum((acum <= obj[:, None]).sum(axis=1), n - 1)
+        parejas[f] = np.where(idx == f, (f + 1) % n, idx)
+
+    return parejas
+
+def _evaluar(puntos, fitness_fn, fitness_lote_fn):
+    """Fitness (array float64) de un array (N,2) de puntos, por lote si es posible."""
+    if len(puntos) == 0:
+        return np.empty(0)
+    if fitness_lote_fn:
+        return np.asarray(fitness_lote_fn(puntos), dtype=np.float64)
+    return np.array([float(fitness_fn(p)) for p in map(tuple, puntos.tolist())])
+
+
+def _centros(p1, f1, p2, f2, tipo_centro):
+    """
+    Centros geométricos o de masa (N,2) entre p1[i] y p2[i]; el de masa cae
+    al geométrico si f1 + f2 es casi cero.
+    """
+    geometrico = (p1 + p2) / 2.0
+    if tipo_centro == "geometrico":
+        return geometrico
+    if tipo_centro != "masa":
+        raise ValueError(f"Tipo de centro desconocido: {tipo_centro}")
+    den = f1 + f2
+    chico = np.abs(den) < 1e-8
+    masa = (p1 * f1[:, None] + p2 * f2[:, None]) / np.where(chico, 1.0, den)[:, None]
+    return np.where(chico[:, None], geometrico, masa)
+
+
+def _fusionar_por_penalizacion(nuevos, size, dist_min, penal_max, evaluar):
+    """
+    Fusiona pares de hijos cuya penalización mutua alcanza penal_max.
+    Recorre los hijos en orden y une cada uno con el primer hijo posterior
+    libre que cumpla la condición (mismo orden voraz de siempre).
+
+    Con dist_min > 0 y penal_max > 0 solo pueden fusionarse hijos a menos
+    de dist_min, así que los candidatos salen de una grilla de celdas de
+    lado dist_min. El fitness de los puntos fusionados se calcula al final,
+    en un solo lote.
+    """
+    n = len(nuevos)
+    pts  = nuevos.coords.tolist()
+    fits = nuevos.fitness.tolist()
+    if dist_min > 0 and penal_max > 0:
+        iq, ir, _ = pares_cercanos(nuevos.coords, nuevos.coords, dist_min)
+        posterior = ir > iq
+        iq, ir = iq[posterior], ir[posterior]
+        cortes = np.cumsum(np.bincount(iq, minlength=n))[:-1]
+        candidatos = [c.tolist() for c in np.split(ir, cortes)]
     else:
-        seleccionados_resto = resto[:puntos - len(mejores)]
-    return mejores + seleccionados_resto
+        candidatos = [range(i + 1, n) for i in range(n)]
+
+    coords = []
+    fitness = []
+    fusionados = []
+    usados = set()
+    for i in range(n):
+        if i in usados:
+            continue
+        p1, f1 = pts[i], fits[i]
+        merged = False
+        for j in candidatos[i]:
+            if j in usados:
+                continue
+            p2, f2 = pts[j], fits[j]
+            d = distancia(p1, p2)
+            penal = penal_max * max(0.0, 1.0 - d/dist_min)
+            if penal >= penal_max:
+                # mismo cálculo de centro robusto
+                den = f1 + f2
+                if abs(den) < 1e-8:
+                    xm = (p1[0] + p2[0]) / 2.0
+                    ym = (p1[1] + p2[1]) / 2.0
+                else:
+                    xm = (p1[0]*f1 + p2[0]*f2) / den
+                    ym = (p1[1]*f1 + p2[1]*f2) / den
+
+                xi = max(0, min(size - 1, int(round(xm))))
+                yi = max(0, min(size - 1, int(round(ym))))
+                fusionados.append(len(coords))
+                coords.append((xi, yi))
+                fitness.append(np.nan)
+                usados.update([i, j])
+                merged = True
+                break
+        if not merged:
+            coords.append(p1)
+            fitness.append(f1)
+            usados.add(i)
+
+    combinados = Poblacion(np.array(coords, dtype=np.int64).reshape(-1, 2), fitness)
+    if fusionados:
+        combinados.fitness[fusionados] = evaluar(combinados.coords[fusionados])
+    return combinados
 
 def cruce_interno_centro(
     coords, size,
@@ -89,118 +277,81 @@ def cruce_interno_centro(
     peso_fitness=1.0,
     peso_distancia=1.0,
     dist_min=None,
-    penal_max=None
+    penal_max=None,
+    rng=None,
+    vecindad=None,
+    fitness_lote_fn=None
 ):
     """
     Genera nuevos puntos como el centro entre pares de puntos, con opción de jitter.
     Admite métodos cercanos, secuencial, ruleta y ruleta_dist, y centros geométrico o de masa.
+
+    coords:   Poblacion (o lista de puntos / de ((x,y), fitness), vía Poblacion.desde)
+    rng:      numpy.random.Generator para las ruletas (si es None se deriva
+              del estado de 'random', de modo que random.seed sigue mandando)
+    vecindad: radio opcional que trunca la ruleta_dist a los vecinos cercanos
+    fitness_lote_fn: función que recibe un array (N,2) de puntos y devuelve sus
+              fitness de una vez; si está, reemplaza a fitness_fn para los hijos
+
+    Devuelve los hijos como Poblacion.
     """
-    # 1) Asegurar fitness en todos los individuos
-    coords_con_fit = []
-    for c in coords:
-        if isinstance(c, tuple) and isinstance(c[0], tuple):
-            pt, ft = c
-            ft = float(ft) if ft is not None else 0.0
+    # 1) Asegurar fitness en todos los individuos (NaN = sin evaluar)
+    padres = Poblacion.desde(coords)
+    fits = padres.fitness.copy()
+    sin_fit = np.isnan(fits)
+    if sin_fit.any():
+        if fitness_fn:
+            fits[sin_fit] = [float(fitness_fn(p)) for p in map(tuple, padres.coords[sin_fit].tolist())]
         else:
-            pt = c
-            ft = float(fitness_fn(pt)) if fitness_fn else 0.0
-        coords_con_fit.append((pt, ft))
+            fits[sin_fit] = 0.0
+    n = len(padres)
 
-    nuevos = []
-    n = len(coords_con_fit)
-
-    # 2) Cruce principal
-    for i, (p1, f1) in enumerate(coords_con_fit):
-        # 2.1) Selección de pareja
+    # 1.1) Pareja de cada individuo
+    with fase("cruce.parejas"):
         if metodo == "cercano":
-            pareja = min(
-                (coords_con_fit[j] for j in range(n) if j != i),
-                key=lambda pf: distancia(p1, pf[0])
-            )
+            # una sola consulta sobre índice espacial
+            parejas = vecinos_mas_cercanos(padres.coords)
         elif metodo == "secuencial":
-            pareja = coords_con_fit[(i + 1) % n]
-        elif metodo == "ruleta":
-            pool = [(p, f) for j,(p,f) in enumerate(coords_con_fit) if j != i]
-            pesos = [max(f,1e-6)**peso_fitness for _,f in pool]
-            pareja = random.choices(pool, weights=pesos, k=1)[0]
-        elif metodo == "ruleta_dist":
-            pool = [(p, f) for j,(p,f) in enumerate(coords_con_fit) if j != i]
-            pesos = []
-            for p2, f2 in pool:
-                d = distancia(p1, p2)
-                factor = (1.0/(1.0+d))**peso_distancia
-                pesos.append((max(f2,1e-6)**peso_fitness) * factor)
-            pareja = random.choices(pool, weights=pesos, k=1)[0]
+            parejas = (np.arange(n) + 1) % n
+        elif metodo in ("ruleta", "ruleta_dist"):
+            # todas las parejas en un solo sorteo vectorizado
+            if rng is None:
+                rng = np.random.default_rng(random.getrandbits(64))
+            if metodo == "ruleta":
+                parejas = muestrear_parejas_ruleta(fits, rng, peso_fitness)
+            else:
+                parejas = muestrear_parejas_ruleta_dist(
+                    padres.coords, fits, rng, peso_fitness, peso_distancia, vecindad
+                )
         else:
             raise ValueError(f"Método desconocido: {metodo}")
 
-        p2, f2 = pareja
-
-        # 2.2) Cálculo de centro
-        if tipo_centro == "geometrico":
-            xm = (p1[0] + p2[0]) / 2.0
-            ym = (p1[1] + p2[1]) / 2.0
-        elif tipo_centro == "masa":
-            den = f1 + f2
-            if abs(den) < 1e-8:
-                # Caída al promedio geométrico
-                xm = (p1[0] + p2[0]) / 2.0
-                ym = (p1[1] + p2[1]) / 2.0
-            else:
-                xm = (p1[0]*f1 + p2[0]*f2) / den
-                ym = (p1[1]*f1 + p2[1]*f2) / den
-        else:
-            raise ValueError(f"Tipo de centro desconocido: {tipo_centro}")
+    # 2) Cruce principal: centros de todos los pares a la vez
+    with fase("cruce.centros"):
+        p1 = padres.coords.astype(np.float64)
+        centros = _centros(p1, fits, p1[parejas], fits[parejas], tipo_centro)
 
-        # 2.3) Aplicar jitter (solo una vez)
+        # 2.1) Jitter: mismos sorteos de random.uniform, en el mismo orden (x, y)
         if jitter > 0:
-            xm += random.uniform(-jitter, jitter)
-            ym += random.uniform(-jitter, jitter)
+            u = np.array([random.random() for _ in range(2 * n)]).reshape(n, 2)
+            centros = centros + (-jitter + (jitter - -jitter) * u)
 
-        # 2.4) Asegurar coordenadas enteras y dentro de [0, size-1]
-        xi = max(0, min(size - 1, int(round(xm))))
-        yi = max(0, min(size - 1, int(round(ym))))
-        pt_final = (xi, yi)
-        ft_final = float(fitness_fn(pt_final)) if fitness_fn else None
+        # 2.2) Coordenadas enteras (redondeo al par, como round) dentro de [0, size-1]
+        nuevos = Poblacion(np.clip(np.rint(centros), 0, size - 1).astype(np.int64))
+    contar("cruce.hijos", n)
 
-        if ft_final is not None:
-            nuevos.append((pt_final, ft_final))
-        else:
-            nuevos.append(pt_final)
+    # 2.3) Fitness de todos los hijos en un solo lote
+    if fitness_fn or fitness_lote_fn:
+        with fase("cruce.fitness"):
+            nuevos = nuevos.con_fitness(_evaluar(nuevos.coords, fitness_fn, fitness_lote_fn))
 
     # 3) Fusión por penalización (opcional)
-    if dist_min is not None and penal_max is not None and fitness_fn:
-        combinados = []
-        usados = set()
-        for i, (p1, f1) in enumerate(nuevos):
-            if i in usados:
-                continue
-            merged = False
-            for j, (p2, f2) in enumerate(nuevos):
-                if j <= i or j in usados:
-                    continue
-                d = distancia(p1, p2)
-                penal = penal_max * max(0.0, 1.0 - d/dist_min)
-                if penal >= penal_max:
-                    # mismo cálculo de centro robusto
-                    den = f1 + f2
-                    if abs(den) < 1e-8:
-                        xm = (p1[0] + p2[0]) / 2.0
-                        ym = (p1[1] + p2[1]) / 2.0
-                    else:
-                        xm = (p1[0]*f1 + p2[0]*f2) / den
-                        ym = (p1[1]*f1 + p2[1]*f2) / den
-
-                    xi = max(0, min(size - 1, int(round(xm))))
-                    yi = max(0, min(size - 1, int(round(ym))))
-                    ft_new = float(fitness_fn((xi, yi)))
-                    combinados.append(((xi, yi), ft_new))
-                    usados.update([i, j])
-                    merged = True
-                    break
-            if not merged:
-                combinados.append((p1, f1))
-                usados.add(i)
-        nuevos = combinados
-
-    return nuevos
\ No newline at end of file
+    if dist_min is not None and penal_max is not None and (fitness_fn or fitness_lote_fn):
+        with fase("cruce.fusion"):
+            nuevos = _fusionar_por_penalizacion(
+                nuevos, size, dist_min, penal_max,
+                lambda pts: _evaluar(pts, fitness_fn, fitness_lote_fn)
+            )
+        contar("cruce.fusionados", n - len(nuevos))
+
+    return nuevos
@@ -0,0 +1,251 @@
+import os
+import json
+import math
+import argparse
+import itertools
+
+import numpy as np
+
+from cargarHeatMap import cargar_heatmap
+from replicas import evolucionar_replicas
+
+# =========================
+# Barrido con successive halving
+# =========================
+# En vez de correr cada combinación de parámetros con todas sus
+# generaciones y semillas, las configuraciones compiten por escalones:
+# en el escalón r cada sobreviviente llega a gen_r generaciones con
+# rep_r réplicas, se ordena por su puntaje y solo pasa al escalón
+# siguiente la mejor 1/eta parte. Las réplicas de un escalón siguen desde
+# donde quedaron en el anterior (no se recalcula nada) y las réplicas
+# nuevas suman semillas.
+#
+# El puntaje es el valor del heatmap sin penalización (del mejor
+# individuo o medio de la población, ver evolucionar_replicas): el
+# fitness penalizado depende de penalizacion_max, así que con él un
+# barrido sobre la penalización favorecería siempre a la más baja.
+
+CRITERIOS = ("mejor", "promedio")
+
+
+def expandir_espacio(espacio):
+    """
+    Lista de escenarios a partir de:
+      - una lista de escenarios (como los JSON de configs/): se usan tal cual
+      - {"base": {...}, "parametros": {"metodo": [...], "jitter": [...], ...}}:
+        el producto cartesiano de los parámetros sobre 'base'
+    """
+    if isinstance(espacio, list):
+        return [dict(cfg) for cfg in espacio]
+    base = espacio.get("base", {})
+    parametros = espacio["parametros"]
+    claves = list(parametros)
+    escenarios = []
+    for valores in itertools.product(*(parametros[k] for k in claves)):
+        cfg = dict(base)
+        cfg.update(zip(claves, valores))
+        escenarios.append(cfg)
+    return escenarios
+
+
+def _etiqueta(cfg, claves):
+    return ",".join(f"{k}={cfg[k]}" for k in claves)
+
+
+def _claves_variables(escenarios):
+    """Parámetros que cambian entre escenarios (para nombrarlos)."""
+    claves = []
+    for k in escenarios[0]:
+        if any(cfg.get(k) != escenarios[0][k] for cfg in escenarios[1:]):
+            claves.append(k)
+    return claves or ["nombre"]
+
+
+def escalones(n_configs, eta, gen_min, gen_max, rep_min, rep_max):
+    """
+    [(generaciones, replicas, sobrevivientes), ...] de cada escalón:
+    generaciones y réplicas crecen por eta hasta gen_max / rep_max, y los
+    sobrevivientes se dividen por eta hasta que queda una configuración
+    o hasta el primer escalón con gen_max y rep_max (seguir podando ahí no
+    agrega información).
+    """
+    n_escalones = max(1, math.ceil(math.log(max(n_configs, 1), eta)) + 1)
+    plan = []
+    vivos = n_configs
+    for r in range(n_escalones):
+        ultimo = r == n_escalones - 1
+        gen = gen_max if ultimo else min(gen_max, gen_min * eta ** r)
+        rep = rep_max if ultimo else min(rep_max, rep_min * eta ** r)
+        plan.append((gen, rep, vivos))
+        if gen == gen_max and rep == rep_max:
+            break
+        vivos = max(1, math.ceil(vivos / eta))
+    return plan
+
+
+def _semilla(semilla, indice, lote):
+    """Semilla distinta por configuración y lote de réplicas."""
+    return int(np.random.SeedSequence([semilla, indice, lote]).generate_state(1)[0])
+
+
+class _Candidato:
+    """Una configuración en carrera: sus lotes de réplicas y sus puntajes."""
+
+    def __init__(self, indice, cfg, etiqueta):
+        self.indice = indice
+        self.cfg = cfg
+        self.etiqueta = etiqueta
+        self.lotes = []        # [(estado de evolucionar_replicas, puntajes (r,)), ...]
+        self.escalon = 0
+        self.generaciones = 0
+
+    @property
+    def replicas(self):
+        return sum(len(p) for _, p in self.lotes)
+
+    @property
+    def puntajes(self):
+        """Puntaje de cada réplica en la última generación alcanzada."""
+        return np.concatenate([p for _, p in self.lotes])
+
+    def avanzar(self, generaciones, replicas, criterio, semilla):
+        """
+        Lleva todas las réplicas a 'generaciones' y agrega un lote nuevo
+        con las que falten para llegar a 'replicas'. Devuelve el trabajo
+        hecho en réplica-generaciones.
+        """
+        heatmap = cargar_heatmap(self.cfg["nombre"], mmap_mode="r")
+        pendientes = [(estado, len(p), p) for estado, p in self.lotes]
+        if replicas > self.replicas:
+            pendientes.append((None, replicas - self.replicas, None))
+
+        trabajo = 0
+        self.lotes = []
+        for estado, r, previos in pendientes:
+            res = evolucionar_replicas(
+                self.cfg, heatmap, r,
+                semilla      = _semilla(semilla, self.indice, len(self.lotes)),
+                estado       = estado,
+                generaciones = generaciones
+            )
+            crudo = res[f"{criterio}_crudo"]
+            trabajo += r * crudo.shape[1]
+            # sin generaciones nuevas el puntaje es el del escalón anterior
+            puntajes = crudo[:, -1] if crudo.shape[1] else previos
+            self.lotes.append((res["estado"], puntajes))
+        self.generaciones = max(self.generaciones, generaciones)
+        return trabajo
+
+    def puntaje(self):
+        return float(self.puntajes.mean())
+
+
+def barrer(escenarios, eta=2, gen_min=10, gen_max=None, rep_min=4, rep_max=32,
+           criterio="mejor", semilla=0):
+    """
+    Corre el successive halving sobre 'escenarios' y devuelve la tabla de
+    posiciones: lista de dicts ordenada de mejor a peor (primero los que
+    llegaron más lejos, luego por puntaje medio). gen_max por defecto es
+    el mayor 'generaciones' de los escenarios.
+    """
+    if criterio not in CRITERIOS:
+        raise ValueError(f"Criterio desconocido: {criterio}")
+    if gen_max is None:
+        gen_max = max(cfg["generaciones"] for cfg in escenarios)
+    claves = _claves_variables(escenarios)
+    candidatos = [
+        _Candidato(i, cfg, _etiqueta(cfg, claves)) for i, cfg in enumerate(escenarios)
+    ]
+
+    plan = escalones(len(candidatos), eta, gen_min, gen_max, rep_min, rep_max)
+    vivos = candidatos
+    trabajo = 0
+    for r, (gen, rep, _) in enumerate(plan):
+        for c in vivos:
+            trabajo += c.avanzar(gen, rep, criterio, semilla)
+            c.escalon = r
+        vivos.sort(key=lambda c: -c.puntaje())
+        print(f"Escalón {r}: {len(vivos)} configuraciones, {gen} generaciones, {rep} réplicas; "
+              f"mejor {vivos[0].etiqueta} ({vivos[0].puntaje():.4f})")
+        if r + 1 < len(plan):
+            vivos = vivos[:plan[r + 1][2]]
+
+    completo = len(candidatos) * gen_max * rep_max
+    print(f"Trabajo: {trabajo} réplica-generaciones, {trabajo / completo:.1%} "
+          f"de correr todo con {gen_max} generaciones y {rep_max} réplicas")
+
+    candidatos.sort(key=lambda c: (-c.escalon, -c.puntaje()))
+    return [
+        dict(
+            puesto       = puesto,
+            etiqueta     = c.etiqueta,
+            escenario    = c.cfg,
+            escalon      = c.escalon,
+            generaciones = c.generaciones,
+            replicas     = len(c.puntajes),
+            puntaje      = c.puntaje(),
+            desvio       = float(c.puntajes.std())
+        )
+        for puesto, c in enumerate(candidatos, start=1)
+    ]
+
+
+def imprimir_tabla(tabla, criterio="mejor"):
+    print(f"{'#':>3}  {'Configuración':<60} {'Esc.':>4} {'Gen':>5} {'Rép':>4} "
+          f"{'Puntaje (' + criterio + ')':>24}")
+    for fila in tabla:
+        print(f"{fila['puesto']:>3}  {fila['etiqueta']:<60} {fila['escalon']:>4} "
+              f"{fila['generaciones']:>5} {fila['replicas']:>4} "
+              f"{fila['puntaje']:>14.4f} ± {fila['desvio']:.4f}")
+
+
+def main(espacio_path, salida=None, **kwargs):
+    with open(espacio_path, 'r', encoding='utf-8') as f:
+        escenarios = expandir_espacio(json.load(f))
+
+    tabla = barrer(escenarios, **kwargs)
+    imprimir_tabla(tabla, kwargs.get("criterio", "mejor"))
+
+    if salida is None:
+        base = os.path.splitext(os.path.basename(espacio_path))[0]
+        salida = f"barrido_{base}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(tabla, f, indent=2, ensure_ascii=False)
+    print(f"✅ Tabla de posiciones en {salida}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Barrido de configuraciones con successive halving sobre el motor de réplicas"
+    )
+    parser.add_argument(
+        "espacio",
+        help="JSON con una lista de escenarios o {'base': {...}, 'parametros': {...}}"
+    )
+    parser.add_argument("--eta", type=int, default=2, help="Factor de poda por escalón")
+    parser.add_argument("--gen-min", type=int, default=10, help="Generaciones del primer escalón")
+    parser.add_argument(
+        "--gen-max", type=int,
+        help="Generaciones del último escalón (por defecto, 'generaciones' del JSON)"
+    )
+    parser.add_argument("--replicas-min", type=int, default=4, help="Réplicas del primer escalón")
+    parser.add_argument("--replicas-max", type=int, default=32, help="Réplicas del último escalón")
+    parser.add_argument(
+        "--criterio", choices=CRITERIOS, default="mejor",
+        help="Valor del heatmap (sin penalización) que se compara: el del mejor individuo "
+             "o el promedio de la población"
+    )
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla base")
+    parser.add_argument("--salida", help="JSON de la tabla de posiciones")
+    args = parser.parse_args()
+    main(
+        args.espacio,
+        salida   = args.salida,
+        eta      = args.eta,
+        gen_min  = args.gen_min,
+        gen_max  = args.gen_max,
+        rep_min  = args.replicas_min,
+        rep_max  = args.replicas_max,
+        criterio = args.criterio,
+        semilla  = args.semilla
+    )
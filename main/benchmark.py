@@ -0,0 +1,324 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+import statistics
+
+import matplotlib
+matplotlib.use("Agg")  # sin pantalla: corre en cualquier máquina
+
+import numpy as np
+import imageio.v2 as imageio
+
+from algoritmo import cruce_interno_centro, seleccionar_poblacion
+from fitness import fitness_con_penalizacion, fitness_con_penalizacion_lote
+from generadorHeatMap import generar_heatmap
+from visualizacion import mostrar_varios_conjuntos
+from generarGif import generar_gif
+from combinarGif import combinar_gifs_en_grilla
+from poblacion import Poblacion
+
+SEMILLA = 1234
+
+# =========================
+# Grilla de escalas
+# =========================
+POBLACIONES = (100, 1_000, 10_000)
+MAPAS       = (256, 1024, 2048)
+LADOS_GIF   = (256, 512)
+FRAMES_GIF  = 20
+
+# versión reducida para una pasada rápida (--rapido)
+POBLACIONES_RAPIDO = (100, 1_000)
+MAPAS_RAPIDO       = (256, 512)
+LADOS_GIF_RAPIDO   = (128,)
+
+METODOS = ("cercano", "secuencial", "ruleta", "ruleta_dist")
+TIPOS_HEATMAP = (
+    ("distancia",       {}),
+    ("distancia_suave", {}),
+    ("random",          {"semilla": SEMILLA}),
+    ("perlin",          {"semilla": SEMILLA, "escala": 100.0, "octavas": 4}),
+    ("fractal",         {"semilla": SEMILLA, "escala_inicial": 0.5, "mascara": True}),
+    ("gradiente",       {}),
+    ("blobs",           {"semilla": SEMILLA, "num_blobs": 14, "radio_min": 30, "radio_max": 120}),
+)
+LADO_EVOLUCION = 1000   # lado del mapa en los casos del GA
+CONSULTAS_FITNESS = 256  # puntos evaluados con fitness_con_penalizacion
+
+
+def _sembrar():
+    random.seed(SEMILLA)
+    np.random.seed(SEMILLA)
+
+
+def _poblacion(n, size=LADO_EVOLUCION, heatmap=None):
+    """Población fija de n individuos (con fitness si se pasa heatmap)."""
+    rng = np.random.default_rng(SEMILLA)
+    coords = rng.integers(0, size, size=(n, 2))
+    fitness = heatmap[coords[:, 0], coords[:, 1]] if heatmap is not None else None
+    return Poblacion(coords, fitness)
+
+
+def _heatmap_evolucion():
+    return generar_heatmap(LADO_EVOLUCION, "perlin", semilla=SEMILLA, escala=100.0)
+
+
+def _frames_sinteticos(carpeta, lado, n_frames):
+    """PNG generacion_{i}.png: un fondo fijo con puntos que se mueven."""
+    rng = np.random.default_rng(SEMILLA)
+    fondo = (generar_heatmap(lado, "perlin", semilla=SEMILLA, escala=lado / 8) * 255).astype(np.uint8)
+    fondo = np.stack([fondo, 255 - fondo, fondo // 2], axis=-1)
+    for i in range(n_frames):
+        frame = fondo.copy()
+        for x, y in rng.integers(0, lado - 4, size=(50, 2)):
+            frame[x:x + 4, y:y + 4] = (0, 0, 0)
+        imageio.imwrite(os.path.join(carpeta, f"generacion_{i}.png"), frame)
+
+
+# =========================
+# Casos
+# =========================
+# Cada caso prepara sus datos fuera de la medición y devuelve la función a
+# medir (sin argumentos). 'tmp' es una carpeta temporal propia del caso.
+def caso_fitness(tmp, n):
+    heatmap = _heatmap_evolucion()
+    referencia = _poblacion(n, heatmap=heatmap).como_tuplas()
+    consultas = _poblacion(CONSULTAS_FITNESS).puntos()[::-1]
+    return lambda: [
+        fitness_con_penalizacion(p, heatmap, referencia, 10, 0.5) for p in consultas
+    ]
+
+
+def caso_fitness_lote(tmp, n):
+    heatmap = _heatmap_evolucion()
+    referencia = _poblacion(n, heatmap=heatmap)
+    consultas = _poblacion(n).coords[::-1]
+    return lambda: fitness_con_penalizacion_lote(consultas, heatmap, referencia, 10, 0.5)
+
+
+def caso_cruce(tmp, metodo, n):
+    heatmap = _heatmap_evolucion()
+    padres = _poblacion(n, heatmap=heatmap)
+    lote = lambda pts: fitness_con_penalizacion_lote(pts, heatmap, padres, 10, 0.5)
+
+    def correr():
+        return cruce_interno_centro(
+            padres, LADO_EVOLUCION,
+            metodo          = metodo,
+            tipo_centro     = "masa",
+            jitter          = 5,
+            peso_distancia  = 2.0,
+            dist_min        = 10,
+            penal_max       = 0.5,
+            rng             = np.random.default_rng(SEMILLA),
+            fitness_lote_fn = lote
+        )
+    return correr
+
+
+def caso_seleccion(tmp, n, aleatorio):
+    heatmap = _heatmap_evolucion()
+    candidatos = _poblacion(2 * n, heatmap=heatmap).ordenada()
+    return lambda: seleccionar_poblacion(candidatos, n, elitismo=n // 10, aleatorio=aleatorio)
+
+
+def caso_heatmap(tmp, tipo, size):
+    params = dict(TIPOS_HEATMAP)[tipo]
+    return lambda: generar_heatmap(size, tipo, **params)
+
+
+def caso_conjuntos(tmp, n):
+    heatmap = _heatmap_evolucion()
+    a = _poblacion(n).como_tuplas()
+    b = _poblacion(n // 2).puntos()
+    ruta = os.path.join(tmp, "conjuntos.png")
+    return lambda: mostrar_varios_conjuntos(
+        [a, b], LADO_EVOLUCION, heatmap=heatmap, guardar_como=ruta
+    )
+
+
+def caso_gif(tmp, lado):
+    _frames_sinteticos(tmp, lado, FRAMES_GIF)
+    salida = os.path.join(tmp, "salida.gif")
+    return lambda: generar_gif(FRAMES_GIF, tmp, salida, duracion=400)
+
+
+def caso_grilla(tmp, lado, gifs=4):
+    _frames_sinteticos(tmp, lado, FRAMES_GIF)
+    rutas = []
+    for i in range(gifs):
+        ruta = os.path.join(tmp, f"entrada_{i}.gif")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generar_gif(FRAMES_GIF, tmp, ruta, duracion=400)
+        rutas.append(ruta)
+    salida = os.path.join(tmp, "grilla.gif")
+    return lambda: combinar_gifs_en_grilla(rutas, salida, duration=400)
+
+
+def casos(rapido=False):
+    """Lista [(nombre, params, preparar), ...] sobre la grilla de escalas."""
+    poblaciones = POBLACIONES_RAPIDO if rapido else POBLACIONES
+    mapas       = MAPAS_RAPIDO if rapido else MAPAS
+    lados_gif   = LADOS_GIF_RAPIDO if rapido else LADOS_GIF
+
+    lista = []
+    for n in poblaciones:
+        lista.append(("fitness_con_penalizacion", {"n": n}, caso_fitness))
+        lista.append(("fitness_con_penalizacion_lote", {"n": n}, caso_fitness_lote))
+        for metodo in METODOS:
+            lista.append(("cruce_interno_centro", {"metodo": metodo, "n": n}, caso_cruce))
+        for aleatorio in (False, True):
+            lista.append(("seleccionar_poblacion", {"n": n, "aleatorio": aleatorio}, caso_seleccion))
+        lista.append(("mostrar_varios_conjuntos", {"n": n}, caso_conjuntos))
+    for tipo, _ in TIPOS_HEATMAP:
+        for size in mapas:
+            lista.append(("generar_heatmap", {"tipo": tipo, "size": size}, caso_heatmap))
+    for lado in lados_gif:
+        lista.append(("generar_gif", {"lado": lado}, caso_gif))
+        lista.append(("combinar_gifs_en_grilla", {"lado": lado}, caso_grilla))
+    return lista
+
+
+def id_caso(nombre, params):
+    """Identificador estable: nombre[clave=valor,...]."""
+    return f"{nombre}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+
+
+# =========================
+# Medición
+# =========================
+def medir(preparar, params, repeticiones=3):
+    """
+    Mide un caso: 'repeticiones' corridas cronometradas (sin tracemalloc,
+    que agrega overhead) y una más con tracemalloc para el pico de memoria
+    asignada durante la llamada. Todas parten de las mismas semillas.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        _sembrar()
+        fn = preparar(tmp, **params)
+        tiempos = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeticiones):
+                _sembrar()
+                t0 = time.perf_counter()
+                fn()
+                tiempos.append(time.perf_counter() - t0)
+
+            _sembrar()
+            tracemalloc.start()
+            try:
+                fn()
+                _, pico = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    return {
+        "segundos":     statistics.median(tiempos),
+        "segundos_min": min(tiempos),
+        "repeticiones": repeticiones,
+        "pico_bytes":   pico
+    }
+
+
+def correr(salida, rapido=False, filtro=None, repeticiones=3):
+    """Corre los casos (los que contienen 'filtro') y guarda el JSON."""
+    resultados = []
+    for nombre, params, preparar in casos(rapido):
+        ident = id_caso(nombre, params)
+        if filtro and filtro not in ident:
+            continue
+        medida = medir(preparar, params, repeticiones)
+        resultados.append({"id": ident, "caso": nombre, "params": params, **medida})
+        print(f"{ident:<60} {medida['segundos']:>9.4f} s {medida['pico_bytes'] / 2**20:>9.1f} MB")
+
+    datos = {
+        "fecha":      time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "semilla":    SEMILLA,
+        "rapido":     rapido,
+        "python":     platform.python_version(),
+        "numpy":      np.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "resultados": resultados
+    }
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+    print(f"Resultados en {salida}")
+    return datos
+
+
+# =========================
+# Comparación
+# =========================
+def comparar(path_base, path_nuevo, umbral=0.10, minimo_segundos=0.001):
+    """
+    Compara dos archivos de resultados caso por caso. Marca como regresión
+    todo caso cuyo tiempo o pico de memoria crezca más que 'umbral'
+    (0.10 = 10 %). Los tiempos por debajo de 'minimo_segundos' son ruido y
+    no se marcan. Devuelve la lista de ids con regresión.
+    """
+    with open(path_base, "r", encoding="utf-8") as f:
+        base = {r["id"]: r for r in json.load(f)["resultados"]}
+    with open(path_nuevo, "r", encoding="utf-8") as f:
+        nuevo = {r["id"]: r for r in json.load(f)["resultados"]}
+
+    regresiones = []
+    print(f"{'Caso':<60} {'Tiempo':>9} {'Memoria':>9}")
+    for ident in sorted(base.keys() & nuevo.keys()):
+        a, b = base[ident], nuevo[ident]
+        r_t = b["segundos"] / a["segundos"] if a["segundos"] > 0 else 1.0
+        r_m = b["pico_bytes"] / a["pico_bytes"] if a["pico_bytes"] > 0 else 1.0
+        lento = r_t > 1 + umbral and b["segundos"] >= minimo_segundos
+        pesado = r_m > 1 + umbral
+        marca = "  ← REGRESIÓN" if lento or pesado else ""
+        if marca:
+            regresiones.append(ident)
+        print(f"{ident:<60} {r_t:>8.2f}x {r_m:>8.2f}x{marca}")
+
+    for ident in sorted(base.keys() - nuevo.keys()):
+        print(f"Aviso: {ident} no está en {path_nuevo}")
+    print(f"{len(regresiones)} regresiones (umbral {umbral:.0%})")
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmarks del GA y de los heatmaps (tiempo y pico de memoria)"
+    )
+    parser.add_argument(
+        "--salida", default="benchmark.json",
+        help="Archivo JSON de resultados"
+    )
+    parser.add_argument(
+        "--rapido", action="store_true",
+        help="Grilla reducida para una pasada rápida"
+    )
+    parser.add_argument(
+        "--filtro",
+        help="Solo los casos cuyo id contiene este texto (p. ej. 'cruce')"
+    )
+    parser.add_argument(
+        "--repeticiones", type=int, default=3,
+        help="Corridas cronometradas por caso (se informa la mediana)"
+    )
+    parser.add_argument(
+        "--comparar", nargs=2, metavar=("BASE", "NUEVO"),
+        help="Compara dos archivos de resultados en vez de medir"
+    )
+    parser.add_argument(
+        "--umbral", type=float, default=0.10,
+        help="Crecimiento relativo que cuenta como regresión (0.10 = 10 %%)"
+    )
+    args = parser.parse_args()
+
+    if args.comparar:
+        regresiones = comparar(*args.comparar, umbral=args.umbral)
+        sys.exit(1 if regresiones else 0)
+    correr(args.salida, rapido=args.rapido, filtro=args.filtro, repeticiones=args.repeticiones)
@@ -1,14 +1,161 @@
 import os
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
 import numpy as np
 
-HEATMAP_DIR = "./heatmaps"
-os.makedirs(HEATMAP_DIR, exist_ok=True)
+from manifiesto import HEATMAP_DIR, resolver_nombre, tocar
+import piramide
+
+# =========================
+# Caché LRU en proceso
+# =========================
+# Presupuesto en bytes de los heatmaps cargados en RAM. Los mapas abiertos
+# con mmap no cuentan: sus páginas viven en la caché del sistema operativo
+# y las comparten todos los procesos que abren el mismo archivo.
+PRESUPUESTO_CACHE_BYTES = 256 * 1024 * 1024
+
+_cache = OrderedDict()   # (ruta, mmap_mode) -> array
+_bytes_en_cache = 0
+
+
+def _peso(arr):
+    return 0 if isinstance(arr, np.memmap) else arr.nbytes
+
+
+def configurar_cache(presupuesto_bytes):
+    """Cambia el presupuesto de la caché LRU y desaloja lo que sobre."""
+    global PRESUPUESTO_CACHE_BYTES
+    PRESUPUESTO_CACHE_BYTES = presupuesto_bytes
+    _desalojar()
+
+
+def vaciar_cache():
+    global _bytes_en_cache
+    _cache.clear()
+    _bytes_en_cache = 0
+
+
+def _desalojar():
+    global _bytes_en_cache
+    while _bytes_en_cache > PRESUPUESTO_CACHE_BYTES and _cache:
+        _, viejo = _cache.popitem(last=False)
+        _bytes_en_cache -= _peso(viejo)
 
-def cargar_heatmap(nombre):
+
+def ruta_heatmap(nombre):
     """
-    Carga un heatmap precomputado de {HEATMAP_DIR}/{nombre}.npy
+    Resuelve un nombre lógico a su archivo: primero por el manifiesto de la
+    caché por contenido y, si no figura, como {HEATMAP_DIR}/{nombre}.npy.
     """
-    path = os.path.join(HEATMAP_DIR, f"{nombre}.npy")
+    path = resolver_nombre(nombre)
+    if path is None:
+        path = os.path.join(HEATMAP_DIR, f"{nombre}.npy")
     if not os.path.exists(path):
         raise FileNotFoundError(f"No existe el heatmap precomputado: {path}")
-    return np.load(path)
+    return path
+
+
+def cargar_heatmap(nombre, mmap_mode=None):
+    """
+    Carga un heatmap precomputado por su nombre lógico (ver ruta_heatmap).
+
+    - mmap_mode: None carga el mapa en RAM; 'r' lo abre como memmap de solo
+      lectura, de modo que varios procesos comparten las mismas páginas.
+
+    Los resultados quedan en una caché LRU acotada por
+    PRESUPUESTO_CACHE_BYTES, indexada por archivo: si el nombre pasa a
+    apuntar a un mapa regenerado no se devuelve el viejo. El array
+    devuelto es de solo lectura.
+    """
+    return _cargar(ruta_heatmap(nombre), mmap_mode)
+
+
+def _cargar(path, mmap_mode):
+    """np.load de solo lectura pasando por la caché LRU."""
+    global _bytes_en_cache
+    clave = (path, mmap_mode)
+    if clave in _cache:
+        _cache.move_to_end(clave)
+        return _cache[clave]
+
+    heatmap = np.load(path, mmap_mode=mmap_mode)
+    heatmap.flags.writeable = False
+    tocar(path)
+
+    if _peso(heatmap) <= PRESUPUESTO_CACHE_BYTES:
+        _cache[clave] = heatmap
+        _bytes_en_cache += _peso(heatmap)
+        _desalojar()
+    return heatmap
+
+
+def cargar_piramide(nombre, mmap_mode="r"):
+    """
+    [mapa, nivel 1, nivel 2, ...]: el heatmap 'nombre' y su pirámide de
+    máximos (ver piramide.py), que se genera junto al mapa la primera vez.
+    Los niveles pasan por la misma caché que los mapas.
+    """
+    rutas = piramide.construir_piramide(ruta_heatmap(nombre))
+    return [_cargar(ruta, mmap_mode) for ruta in rutas]
+
+# =========================
+# Memoria compartida entre procesos
+# =========================
+class HeatmapCompartido:
+    """
+    Handle liviano (se puede enviar a otro proceso) de un heatmap copiado
+    una sola vez a memoria compartida. Los procesos hijos lo abren con
+    adjuntar_heatmap() sin copiar los datos.
+    """
+
+    def __init__(self, nombre_shm, shape, dtype):
+        self.nombre_shm = nombre_shm
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype).str
+
+
+# segmentos creados por este proceso y segmentos abiertos desde hijos
+_creados   = {}
+_adjuntos  = {}
+
+
+def compartir_heatmap(nombre):
+    """
+    Copia el heatmap 'nombre' a un segmento de memoria compartida (una sola
+    vez por proceso) y devuelve su HeatmapCompartido.
+    """
+    if nombre in _creados:
+        return _creados[nombre][1]
+
+    heatmap = cargar_heatmap(nombre, mmap_mode="r")
+    shm = shared_memory.SharedMemory(create=True, size=max(1, heatmap.nbytes))
+    destino = np.ndarray(heatmap.shape, dtype=heatmap.dtype, buffer=shm.buf)
+    destino[...] = heatmap
+
+    handle = HeatmapCompartido(shm.name, heatmap.shape, heatmap.dtype)
+    _creados[nombre] = (shm, handle)
+    return handle
+
+
+def adjuntar_heatmap(handle):
+    """Devuelve un array de solo lectura sobre el segmento compartido."""
+    shm = _adjuntos.get(handle.nombre_shm)
+    if shm is None:
+        try:
+            # Python >= 3.13: el hijo no debe borrar el segmento al salir
+            shm = shared_memory.SharedMemory(name=handle.nombre_shm, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=handle.nombre_shm)
+        _adjuntos[handle.nombre_shm] = shm
+    heatmap = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf)
+    heatmap.flags.writeable = False
+    return heatmap
+
+
+def liberar_compartidos():
+    """Cierra y elimina los segmentos creados por este proceso."""
+    for shm, _ in _creados.values():
+        shm.close()
+        shm.unlink()
+    _creados.clear()
@@ -0,0 +1,85 @@
+import os
+import json
+import random
+import hashlib
+import zipfile
+
+import numpy as np
+
+from poblacion import Poblacion
+
+CHECKPOINT_DIR = "./checkpoints"
+
+# =========================
+# Checkpoints de la evolución
+# =========================
+# Un checkpoint es un .npz con todo lo que hace falta para seguir la
+# evolución exactamente donde quedó: la población (coordenadas, fitness y
+# edad), la próxima generación a correr, las generaciones que ya tienen
+# frame, los estados de 'random' y del Generator de numpy, y un hash del
+# escenario. 'generaciones' no entra en el hash: así se puede retomar una
+# corrida terminada y extenderla. Tampoco las opciones de salida, que no
+# cambian la evolución.
+EXCLUIDOS_HASH = ("generaciones", "guardar_png", "salida", "salida_cada")
+
+
+def hash_escenario(cfg, semilla):
+    """Hash del escenario (sin 'generaciones') y de su semilla."""
+    contenido = {k: v for k, v in cfg.items() if k not in EXCLUIDOS_HASH}
+    contenido["__semilla__"] = int(semilla)
+    texto = json.dumps(contenido, sort_keys=True)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:20]
+
+
+def ruta_checkpoint(base, indice, nombre, directorio=CHECKPOINT_DIR):
+    """Archivo del checkpoint del escenario 'indice' del JSON 'base'."""
+    return os.path.join(directorio, base, f"{indice}_{nombre}.npz")
+
+
+def guardar_checkpoint(path, poblacion, generacion, rng, clave, frames=()):
+    """
+    Guarda el estado tras completar las generaciones 0 … generacion-1.
+    Escritura atómica: si la corrida muere a mitad, queda el anterior.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(
+        tmp,
+        coords     = poblacion.coords,
+        fitness    = poblacion.fitness,
+        edad       = poblacion.edad,
+        generacion = generacion,
+        frames     = np.asarray(frames, dtype=np.int64),
+        random     = json.dumps(random.getstate()),
+        rng        = json.dumps(rng.bit_generator.state),
+        clave      = clave
+    )
+    os.replace(tmp, path)
+
+
+def cargar_checkpoint(path, rng, clave):
+    """
+    Restaura los estados de 'random' y de 'rng' desde el checkpoint y
+    devuelve (poblacion, generacion, frames). Devuelve None, sin tocar
+    nada, si no hay checkpoint, si está dañado o si es de otro escenario.
+    """
+    if not os.path.isfile(path):
+        return None
+    try:
+        with np.load(path) as datos:
+            if str(datos["clave"]) != clave:
+                print(f"Aviso: {path} es de otra configuración, se empieza de cero")
+                return None
+            poblacion  = Poblacion(datos["coords"], datos["fitness"], datos["edad"])
+            generacion = int(datos["generacion"])
+            frames     = datos["frames"].tolist()
+            estado_random = json.loads(str(datos["random"]))
+            estado_rng    = json.loads(str(datos["rng"]))
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        print(f"Aviso: {path} está dañado, se empieza de cero")
+        return None
+
+    version, interno, gauss = estado_random
+    random.setstate((version, tuple(interno), gauss))
+    rng.bit_generator.state = estado_rng
+    return poblacion, generacion, frames
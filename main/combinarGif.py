@@ -3,6 +3,8 @@ import math
 import numpy as np
 import imageio
 
+from generarGif import EscritorGif, a_rgb
+
 def combinar_gifs_en_grilla(gif_paths, output_path, cols=None, duration=0.1, gap=5):
     """
     Combina varios GIFs en una grilla de hasta 4 columnas por fila,
@@ -14,76 +16,50 @@ def combinar_gifs_en_grilla(gif_paths, output_path, cols=None, duration=0.1, gap
     duration:    segundos por frame
     gap:         separación (px) entre celdas
     """
-    # Lectores de cada GIF y conteo de frames mínimos
+    # Lectores secuenciales de cada GIF (sin acceso aleatorio por índice)
     readers = [imageio.get_reader(p) for p in gif_paths]
-    n_frames = min(r.get_length() for r in readers)
-    n_gifs    = len(gif_paths)
+    iters   = [r.iter_data() for r in readers]
+    n_gifs  = len(gif_paths)
 
     # Fijar 4 columnas si no se pasa otro valor
     if cols is None:
         cols = 4
     rows = math.ceil(n_gifs / cols)
 
-    # Dimensiones de muestra
-    sample = readers[0].get_data(0)
-    h, w   = sample.shape[:2]
-    pad_w  = np.zeros((h, gap, 3), dtype=np.uint8)
+    try:
+        # Dimensiones de muestra (primer frame del primer GIF)
+        frames = [a_rgb(next(it)) for it in iters]
+        h, w   = frames[0].shape[:2]
 
-    final_frames = []
-    for i in range(n_frames):
-        # Leer cada frame (o negro si no existe)
-        frames = []
+        # Un único lienzo con las separaciones ya incluidas; las celdas
+        # vacías y los huecos quedan en negro
+        lienzo = np.zeros(
+            (rows * h + (rows - 1) * gap, cols * w + (cols - 1) * gap, 3),
+            dtype=np.uint8
+        )
+        slots = [
+            (ry * (h + gap), cx * (w + gap))
+            for ry in range(rows) for cx in range(cols)
+        ][:n_gifs]
+
+        # Componer y escribir cada frame apenas está listo; termina con el
+        # GIF más corto, igual que antes
+        with EscritorGif(output_path, duracion=duration, loop=0) as writer:
+            while True:
+                for (y0, x0), frame in zip(slots, frames):
+                    # la celda se limpia antes: un frame más chico no deja
+                    # a la vista restos del anterior
+                    lienzo[y0:y0 + h, x0:x0 + w] = 0
+                    fh, fw = min(h, frame.shape[0]), min(w, frame.shape[1])
+                    lienzo[y0:y0 + fh, x0:x0 + fw] = frame[:fh, :fw]
+                writer.agregar(lienzo)
+                try:
+                    frames = [a_rgb(next(it)) for it in iters]
+                except StopIteration:
+                    break
+    finally:
         for r in readers:
-            try:
-                frame = r.get_data(i)
-            except IndexError:
-                frame = np.zeros((h, w, 3), dtype=np.uint8)
-            if frame.ndim == 2:
-                frame = np.stack([frame]*3, axis=2)
-            elif frame.shape[2] == 4:
-                frame = frame[..., :3]
-            frames.append(frame)
-
-        # Construir filas de hasta 'cols' imágenes
-        grid_rows = []
-        for ry in range(rows):
-            row_imgs = []
-            for cx in range(cols):
-                idx = ry * cols + cx
-                img = frames[idx] if idx < len(frames) else np.zeros((h, w, 3), dtype=np.uint8)
-                if cx > 0:
-                    row_imgs.append(pad_w)
-                row_imgs.append(img)
-            grid_rows.append(np.hstack(row_imgs))
-
-        # Normalizar anchos de fila
-        max_w = max(r.shape[1] for r in grid_rows)
-        norm_rows = []
-        for row in grid_rows:
-            if row.shape[1] < max_w:
-                extra = max_w - row.shape[1]
-                pad   = np.zeros((h, extra, 3), dtype=np.uint8)
-                row   = np.hstack([row, pad])
-            norm_rows.append(row)
-
-        # Apilar filas con separación horizontal
-        grid_with_gap = []
-        for ry, row in enumerate(norm_rows):
-            if ry > 0:
-                pad_h = np.zeros((gap, max_w, 3), dtype=np.uint8)
-                grid_with_gap.append(pad_h)
-            grid_with_gap.append(row)
-
-        final_frames.append(np.vstack(grid_with_gap))
-
-    # Escribir GIF final
-    with imageio.get_writer(output_path, mode='I', duration=duration,loop=0) as writer:
-        for frame in final_frames:
-            writer.append_data(frame)
-
-    for r in readers:
-        r.close()
-
+            r.close()
 
 if __name__ == "__main__":
     base_dir = "./gif"
@@ -0,0 +1,193 @@
+import numpy as np
+
+from poblacion import Poblacion
+from perfil import contar
+
+# =========================
+# Índice espacial por grilla
+# =========================
+def como_array_coords(puntos):
+    """
+    Convierte una población al array (N,2) de coordenadas.
+    Acepta una Poblacion, un array ya formado, una lista [(x,y), ...] o
+    una lista [((x,y), fitness), ...].
+    """
+    if isinstance(puntos, Poblacion):
+        return puntos.coords
+    if isinstance(puntos, np.ndarray):
+        return puntos.reshape(-1, 2)
+    pts = [p[0] if isinstance(p[0], tuple) else p for p in puntos]
+    if not pts:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.asarray(pts)
+
+
+class GrillaEspacial:
+    """
+    Índice de puntos 2D agrupados en celdas cuadradas de lado 'celda'.
+    Las celdas se guardan ordenadas por clave, de modo que cada consulta
+    se resuelve con búsquedas binarias sobre arrays (sin dicts de Python).
+    """
+
+    def __init__(self, puntos, celda):
+        self.puntos = np.asarray(puntos, dtype=np.float64).reshape(-1, 2)
+        self.celda  = float(celda)
+
+        celdas = np.floor(self.puntos / self.celda).astype(np.int64)
+        if len(celdas):
+            self.origen = celdas.min(axis=0)
+            self.ancho  = int(celdas[:, 1].max() - self.origen[1]) + 1
+        else:
+            self.origen = np.zeros(2, dtype=np.int64)
+            self.ancho  = 1
+
+        claves = self._claves(celdas)
+        # orden estable: dentro de cada celda los índices quedan crecientes
+        self.orden  = np.argsort(claves, kind="stable")
+        self.claves = claves[self.orden]
+
+    def _claves(self, celdas):
+        rel = celdas - self.origen
+        return rel[:, 0] * self.ancho + rel[:, 1]
+
+    def celdas_de(self, consultas):
+        consultas = np.asarray(consultas, dtype=np.float64).reshape(-1, 2)
+        return np.floor(consultas / self.celda).astype(np.int64)
+
+    def candidatos(self, celdas, dx, dy):
+        """
+        Para cada celda consultada desplazada en (dx, dy) devuelve
+        (iq, ir): índice de la consulta e índice del punto indexado.
+        """
+        vecinas = celdas + np.array([dx, dy], dtype=np.int64)
+        rel     = vecinas - self.origen
+        # las celdas fuera del rango de columnas no existen en el índice
+        validas = (rel[:, 1] >= 0) & (rel[:, 1] < self.ancho)
+        claves  = rel[:, 0] * self.ancho + rel[:, 1]
+
+        lo = np.searchsorted(self.claves, claves, side="left")
+        hi = np.searchsorted(self.claves, claves, side="right")
+        cnt = np.where(validas, hi - lo, 0)
+
+        total = int(cnt.sum())
+        if total == 0:
+            vacio = np.empty(0, dtype=np.int64)
+            return vacio, vacio
+
+        iq  = np.repeat(np.arange(len(celdas)), cnt)
+        ini = np.repeat(lo - (np.cumsum(cnt) - cnt), cnt)
+        ir  = self.orden[ini + np.arange(total)]
+        return iq, ir
+
+
+def pares_cercanos(consultas, referencias, radio):
+    """
+    Devuelve (iq, ir, d) con todos los pares consulta/referencia a
+    distancia estrictamente menor que 'radio', ordenados por consulta
+    y, dentro de cada consulta, por índice de referencia creciente.
+    """
+    consultas   = np.asarray(consultas, dtype=np.float64).reshape(-1, 2)
+    referencias = np.asarray(referencias, dtype=np.float64).reshape(-1, 2)
+
+    if radio <= 0 or len(consultas) == 0 or len(referencias) == 0:
+        vacio = np.empty(0, dtype=np.int64)
+        return vacio, vacio, np.empty(0)
+
+    grilla = GrillaEspacial(referencias, radio)
+    celdas = grilla.celdas_de(consultas)
+
+    iqs, irs = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            iq, ir = grilla.candidatos(celdas, dx, dy)
+            iqs.append(iq)
+            irs.append(ir)
+    iq = np.concatenate(iqs)
+    ir = np.concatenate(irs)
+
+    # distancia con el cuadrado exacto (coordenadas enteras) y una sola raíz
+    ddx = consultas[iq, 0] - referencias[ir, 0]
+    ddy = consultas[iq, 1] - referencias[ir, 1]
+    d   = np.sqrt(ddx * ddx + ddy * ddy)
+    contar("distancias", len(d))
+
+    dentro = d < radio
+    iq, ir, d = iq[dentro], ir[dentro], d[dentro]
+
+    orden = np.lexsort((ir, iq))
+    return iq[orden], ir[orden], d[orden]
+
+
+def _anillo(r):
+    """Desplazamientos (dx, dy) de las celdas a distancia de Chebyshev r."""
+    if r == 0:
+        return [(0, 0)]
+    return [
+        (dx, dy)
+        for dx in range(-r, r + 1)
+        for dy in range(-r, r + 1)
+        if max(abs(dx), abs(dy)) == r
+    ]
+
+
+def vecinos_mas_cercanos(puntos):
+    """
+    Para cada punto devuelve el índice del otro punto más cercano
+    (excluyendo su propio índice). Ante empates gana el índice menor,
+    igual que min() recorriendo la población en orden.
+
+    La búsqueda recorre anillos de celdas alrededor de cada punto y se
+    detiene cuando ningún anillo siguiente puede contener un punto más
+    cercano que el mejor encontrado.
+    """
+    pts = np.asarray(puntos, dtype=np.float64).reshape(-1, 2)
+    n = len(pts)
+    if n < 2:
+        raise ValueError("Se necesitan al menos dos puntos para buscar vecinos.")
+
+    # celda entera con ~1 punto por celda en promedio
+    extension = pts.max(axis=0) - pts.min(axis=0) + 1
+    celda = max(1, int(np.ceil(np.sqrt(extension[0] * extension[1] / n))))
+
+    grilla = GrillaEspacial(pts, celda)
+    celdas = grilla.celdas_de(pts)
+
+    mejor_d2 = np.full(n, np.inf)
+    mejor_j  = np.full(n, n, dtype=np.int64)
+
+    pendientes = np.arange(n)
+    r = 0
+    while pendientes.size:
+        iqs, irs = [], []
+        for dx, dy in _anillo(r):
+            iq, ir = grilla.candidatos(celdas[pendientes], dx, dy)
+            iqs.append(pendientes[iq])
+            irs.append(ir)
+        q = np.concatenate(iqs)
+        j = np.concatenate(irs)
+
+        distinto = q != j
+        q, j = q[distinto], j[distinto]
+        if q.size:
+            ddx = pts[q, 0] - pts[j, 0]
+            ddy = pts[q, 1] - pts[j, 1]
+            d2  = ddx * ddx + ddy * ddy
+            contar("distancias", q.size)
+
+            # mejor candidato del anillo por consulta: menor d2, luego menor j
+            orden = np.lexsort((j, d2, q))
+            q, j, d2 = q[orden], j[orden], d2[orden]
+            primero = np.ones(q.size, dtype=bool)
+            primero[1:] = q[1:] != q[:-1]
+            q, j, d2 = q[primero], j[primero], d2[primero]
+
+            mejora = (d2 < mejor_d2[q]) | ((d2 == mejor_d2[q]) & (j < mejor_j[q]))
+            mejor_d2[q[mejora]] = d2[mejora]
+            mejor_j[q[mejora]]  = j[mejora]
+
+        # lo que quede fuera del anillo r está a más de r*celda
+        limite = float((r * celda) ** 2)
+        pendientes = pendientes[mejor_d2[pendientes] > limite]
+        r += 1
+
+    return mejor_j
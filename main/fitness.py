@@ -0,0 +1,222 @@
+import math
+import numpy as np
+
+from espacial import como_array_coords, pares_cercanos
+from perfil import contar
+
+def fitness_con_penalizacion(p, heatmap, poblacion, dist_min, penal_max):
+    contar("fitness.evaluaciones")
+    contar("distancias", len(poblacion))
+    base = heatmap[p[0], p[1]]
+    penal = 0
+    for q in poblacion:
+        q_pt = q[0] if isinstance(q[0], tuple) else q
+        d = math.hypot(p[0] - q_pt[0], p[1] - q_pt[1])
+        if d < dist_min:
+            penal += penal_max * (1 - d / dist_min)
+    return base - penal
+
+
+def fitness_con_penalizacion_lote(puntos, heatmap, poblacion, dist_min, penal_max):
+    """
+    Versión por lotes de fitness_con_penalizacion.
+
+    puntos:    array (N,2) de coordenadas enteras (o lista de puntos)
+    poblacion: población de referencia (array (M,2) o lista de tuplas)
+
+    Solo se visitan los vecinos a menos de dist_min mediante una grilla
+    de celdas de lado dist_min. Las penalizaciones de cada punto se
+    acumulan en el mismo orden que recorre la versión escalar, por lo que
+    el resultado coincide valor a valor.
+    """
+    puntos = como_array_coords(puntos).astype(np.int64, copy=False)
+    refs   = como_array_coords(poblacion)
+    contar("fitness.evaluaciones", len(puntos))
+
+    base = np.asarray(heatmap[puntos[:, 0], puntos[:, 1]], dtype=np.float64)
+
+    iq, _, d = pares_cercanos(puntos, refs, dist_min)
+    if len(iq) == 0:
+        return base
+
+    terminos = penal_max * (1 - d / dist_min)
+
+    # posición de cada par dentro de los vecinos de su consulta
+    inicio = np.searchsorted(iq, iq, side="left")
+    rango  = np.arange(len(iq)) - inicio
+
+    # suma secuencial por rango: vectorizada sobre todos los puntos
+    orden  = np.argsort(rango, kind="stable")
+    cortes = np.cumsum(np.bincount(rango))
+    penal  = np.zeros(len(puntos))
+    for sel in np.split(orden, cortes[:-1]):
+        penal[iq[sel]] += terminos[sel]
+
+    return base - penal
+
+
+def fitness_con_penalizacion_replicas(puntos, validos, heatmap, referencias, refs_validos,
+                                      dist_min, penal_max, max_elementos=4_000_000):
+    """
+    Fitness con penalización para R réplicas a la vez.
+
+    puntos (R,N,2) / validos (R,N): puntos a evaluar de cada réplica
+    referencias (R,M,2) / refs_validos (R,M): población de referencia
+
+    Las distancias se calculan como una matriz densa (R,N,M), por bloques
+    de réplicas de a lo sumo max_elementos celdas. Los puntos no válidos
+    quedan con fitness -inf.
+    """
+    R, N = validos.shape
+    M = refs_validos.shape[1]
+    base = np.asarray(heatmap[puntos[..., 0], puntos[..., 1]], dtype=np.float64)
+    penal = np.zeros((R, N))
+
+    if dist_min > 0 and N and M:
+        paso = max(1, max_elementos // (N * M))
+        for a in range(0, R, paso):
+            b = min(R, a + paso)
+            dx = puntos[a:b, :, None, 0] - referencias[a:b, None, :, 0]
+            dy = puntos[a:b, :, None, 1] - referencias[a:b, None, :, 1]
+            d  = np.sqrt((dx * dx + dy * dy).astype(np.float64))
+            t  = penal_max * (1 - d / dist_min)
+            t[(d >= dist_min) | ~refs_validos[a:b, None, :]] = 0.0
+            penal[a:b] = t.sum(axis=2)
+
+    return np.where(validos, base - penal, -np.inf)
+
+# =========================
+# Evaluación con caché
+# =========================
+class EvaluadorFitness:
+    """
+    Evalúa fitness_con_penalizacion_lote con memoria por población de
+    referencia.
+
+    - Dentro de un lote, los puntos repetidos (misma celda) se calculan
+      una sola vez.
+    - Los resultados se recuerdan mientras la referencia no cambie, así
+      que volver a puntuar los mismos hijos contra los mismos
+      seleccionados no recalcula nada.
+    - Si la nueva referencia tiene el mismo largo y solo cambian unas
+      pocas posiciones (a lo sumo 'umbral_cambios' del total), solo se
+      olvidan los puntos a menos de dist_min de un punto que entró o
+      salió; el resto conserva su valor exacto (sus términos de
+      penalización no cambian ni de valor ni de orden).
+
+    Los valores coinciden con fitness_con_penalizacion_lote. Los
+    contadores (aciertos, fallos, repetidos, invalidaciones) muestran
+    cuánto trabajo se ahorra.
+    """
+
+    def __init__(self, heatmap, dist_min, penal_max, umbral_cambios=0.25):
+        self.heatmap   = heatmap
+        self.dist_min  = dist_min
+        self.penal_max = penal_max
+        self.umbral_cambios = umbral_cambios
+        self.ancho = heatmap.shape[1]
+
+        self.referencia = None
+        self.claves  = np.empty(0, dtype=np.int64)    # celdas memorizadas, ordenadas
+        self.valores = np.empty(0)
+
+        self.aciertos = 0
+        self.fallos   = 0
+        self.repetidos = 0
+        self.invalidaciones = 0
+        self.parciales = 0
+
+    def _sin_penalizacion(self):
+        return self.dist_min <= 0 or self.penal_max == 0
+
+    def _olvidar(self, mantener):
+        self.claves  = self.claves[mantener]
+        self.valores = self.valores[mantener]
+
+    def fijar_referencia(self, poblacion):
+        """Cambia la población de referencia, invalidando solo lo necesario."""
+        refs = np.array(como_array_coords(poblacion), dtype=np.int64)
+        viejo = self.referencia
+        self.referencia = refs
+        if viejo is None or self._sin_penalizacion():
+            return
+        if viejo.shape == refs.shape:
+            cambios = np.flatnonzero((viejo != refs).any(axis=1))
+            if cambios.size == 0:
+                return
+            if cambios.size <= self.umbral_cambios * len(refs):
+                # solo se afectan los puntos cerca de lo que entró o salió
+                movidos = np.concatenate([viejo[cambios], refs[cambios]])
+                memo = np.stack([self.claves // self.ancho, self.claves % self.ancho], axis=1)
+                iq, _, _ = pares_cercanos(memo, movidos, self.dist_min)
+                mantener = np.ones(len(self.claves), dtype=bool)
+                mantener[iq] = False
+                self._olvidar(mantener)
+                self.parciales += 1
+                return
+        self._olvidar(np.zeros(len(self.claves), dtype=bool))
+        self.invalidaciones += 1
+
+    def cambiar_mapa(self, heatmap, dist_min):
+        """Pasa a otro heatmap (otro nivel de la pirámide) y olvida lo memorizado."""
+        self.heatmap  = heatmap
+        self.dist_min = dist_min
+        self.ancho    = heatmap.shape[1]
+        self.referencia = None
+        self._olvidar(np.zeros(len(self.claves), dtype=bool))
+
+    def evaluar(self, puntos, poblacion=None):
+        """
+        Fitness de 'puntos' contra 'poblacion' (o contra la referencia ya
+        fijada si no se pasa).
+        """
+        if poblacion is not None:
+            self.fijar_referencia(poblacion)
+        if self.referencia is None:
+            raise ValueError("Falta la población de referencia del evaluador.")
+        puntos = como_array_coords(puntos).astype(np.int64, copy=False)
+        if len(puntos) == 0:
+            return np.empty(0)
+
+        claves = puntos[:, 0] * self.ancho + puntos[:, 1]
+        unicas, inversa = np.unique(claves, return_inverse=True)
+        self.repetidos += len(claves) - len(unicas)
+
+        if len(self.claves):
+            pos = np.minimum(np.searchsorted(self.claves, unicas), len(self.claves) - 1)
+            conocidas = self.claves[pos] == unicas
+        else:
+            pos = np.zeros(len(unicas), dtype=np.int64)
+            conocidas = np.zeros(len(unicas), dtype=bool)
+
+        valores = np.empty(len(unicas))
+        valores[conocidas] = self.valores[pos[conocidas]]
+        nuevas = unicas[~conocidas]
+        self.aciertos += int(conocidas.sum())
+        self.fallos   += len(nuevas)
+
+        if len(nuevas):
+            pts = np.stack([nuevas // self.ancho, nuevas % self.ancho], axis=1)
+            calculados = fitness_con_penalizacion_lote(
+                pts, self.heatmap, self.referencia, self.dist_min, self.penal_max
+            )
+            valores[~conocidas] = calculados
+
+            claves  = np.concatenate([self.claves, nuevas])
+            orden   = np.argsort(claves, kind="stable")
+            self.claves  = claves[orden]
+            self.valores = np.concatenate([self.valores, calculados])[orden]
+
+        return valores[inversa.reshape(-1)]
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos + self.repetidos
+        return dict(
+            consultas      = consultas,
+            aciertos       = self.aciertos,
+            fallos         = self.fallos,
+            repetidos      = self.repetidos,
+            invalidaciones = self.invalidaciones,
+            parciales      = self.parciales,
+            ahorro         = (consultas - self.fallos) / consultas if consultas else 0.0
+        )
@@ -1,18 +1,299 @@
 import os
 import math
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import matplotlib.pyplot as plt
+from numpy.lib.format import open_memmap
 
-try:
-    from noise import pnoise2  # Para Perlin Noise
-except ImportError:
-    pnoise2 = None
+from manifiesto import clave_heatmap, buscar, guardar, registrar, ruta_de
+from piramide import cargar_piramide, nivel_para
 
 # =========================
-# Directorio de caché
+# Ruido Perlin vectorizado
 # =========================
-HEATMAP_DIR = "./heatmaps"
-os.makedirs(HEATMAP_DIR, exist_ok=True)
+# Tabla de permutación clásica de Ken Perlin (la misma que usa noise.pnoise2)
+_PERM_PERLIN = np.array([
+    151,160,137,91,90,15,131,13,201,95,96,53,194,233,7,225,140,36,103,30,69,142,
+    8,99,37,240,21,10,23,190,6,148,247,120,234,75,0,26,197,62,94,252,219,203,117,
+    35,11,32,57,177,33,88,237,149,56,87,174,20,125,136,171,168,68,175,74,165,71,
+    134,139,48,27,166,77,146,158,231,83,111,229,122,60,211,133,230,220,105,92,41,
+    55,46,245,40,244,102,143,54,65,25,63,161,1,216,80,73,209,76,132,187,208,89,
+    18,169,200,196,135,130,116,188,159,86,164,100,109,198,173,186,3,64,52,217,226,
+    250,124,123,5,202,38,147,118,126,255,82,85,212,207,206,59,227,47,16,58,17,182,
+    189,28,42,223,183,170,213,119,248,152,2,44,154,163,70,221,153,101,155,167,43,
+    172,9,129,22,39,253,19,98,108,110,79,113,224,232,178,185,112,104,218,246,97,
+    228,251,34,242,193,238,210,144,12,191,179,162,241,81,51,145,235,249,14,239,
+    107,49,192,214,31,181,199,106,157,184,84,204,176,115,121,50,45,127,4,150,254,
+    138,236,205,93,222,114,67,29,24,72,243,141,128,195,78,66,215,61,156,180
+])
+
+# Gradientes (x, y) de GRAD3, indexados por hash & 15
+_GRAD_PERLIN = np.array([
+    [1, 1], [-1, 1], [1, -1], [-1, -1], [1, 0], [-1, 0], [1, 0], [-1, 0],
+    [0, 1], [0, -1], [0, 1], [0, -1], [1, 0], [-1, 0], [0, -1], [0, 1]
+], dtype=np.float32)
+
+
+def _perlin_octava(x, y, repeticion, perm):
+    """Una octava de ruido de gradiente 2D sobre arrays float32 (como noise2 en C)."""
+    f32 = np.float32
+    i  = np.floor(np.fmod(x, repeticion)).astype(np.int64)
+    j  = np.floor(np.fmod(y, repeticion)).astype(np.int64)
+    ii = np.fmod((i + 1).astype(f32), repeticion).astype(np.int64) & 255
+    jj = np.fmod((j + 1).astype(f32), repeticion).astype(np.int64) & 255
+    i &= 255
+    j &= 255
+
+    x = x - np.floor(x)
+    y = y - np.floor(y)
+    fx = x * x * x * (x * (x * f32(6) - f32(15)) + f32(10))
+    fy = y * y * y * (y * (y * f32(6) - f32(15)) + f32(10))
+
+    A, B = perm[i], perm[ii]
+    AA, AB, BA, BB = perm[A + j], perm[A + jj], perm[B + j], perm[B + jj]
+
+    def grad(h, gx, gy):
+        g = _GRAD_PERLIN[perm[h] & 15]
+        return gx * g[..., 0] + gy * g[..., 1]
+
+    uno = f32(1)
+    a = grad(AA, x, y)
+    b = grad(BA, x - uno, y)
+    c = grad(AB, x, y - uno)
+    d = grad(BB, x - uno, y - uno)
+    ab = a + fx * (b - a)
+    cd = c + fx * (d - c)
+    return ab + fy * (cd - ab)
+
+
+def permutacion_perlin(semilla=None):
+    """
+    Tabla de permutación duplicada (512 entradas): la clásica con
+    semilla=None, o una barajada con esa semilla.
+    """
+    if semilla is None:
+        perm = _PERM_PERLIN
+    else:
+        perm = np.random.default_rng(semilla).permutation(256)
+    return np.concatenate([perm, perm]).astype(np.int64)
+
+
+def perlin_region(x0, x1, y0, y1, escala, octavas, perm, persistencia=0.5, lacunaridad=2.0):
+    """Ruido Perlin (sin normalizar) de las celdas [x0:x1, y0:y1]."""
+    f32 = np.float32
+    X = (np.arange(x0, x1) / escala).astype(f32)[:, None]
+    Y = (np.arange(y0, y1) / escala).astype(f32)[None, :]
+    if octavas == 1:
+        return _perlin_octava(X, Y, f32(1024), perm).astype(np.float64)
+
+    frec, amp, maximo = f32(1), f32(1), f32(0)
+    total = np.zeros((x1 - x0, y1 - y0), dtype=f32)
+    for _ in range(octavas):
+        total = total + _perlin_octava(X * frec, Y * frec, f32(1024) * frec, perm) * amp
+        maximo += amp
+        frec *= f32(lacunaridad)
+        amp  *= f32(persistencia)
+    return (total / maximo).astype(np.float64)
+
+
+def ruido_perlin(size, escala=50.0, octavas=4, semilla=None, persistencia=0.5,
+                 lacunaridad=2.0, filas_bloque=None):
+    """
+    Ruido Perlin 2D de size x size, evaluado sobre la grilla entera con NumPy.
+
+    Con semilla=None usa la permutación clásica y reproduce
+    pnoise2(x / escala, y / escala, octaves=octavas) celda a celda; con una
+    semilla entera baraja la permutación (mapas distintos y reproducibles).
+    filas_bloque limita cuántas filas se evalúan a la vez (memoria acotada).
+    """
+    perm = permutacion_perlin(semilla)
+    if filas_bloque is None:
+        filas_bloque = size
+
+    salida = np.empty((size, size), dtype=np.float64)
+    for a in range(0, size, filas_bloque):
+        b = min(size, a + filas_bloque)
+        salida[a:b] = perlin_region(
+            a, b, 0, size, escala, octavas, perm, persistencia, lacunaridad
+        )
+    return salida
+
+# =========================
+# Fractal diamante-cuadrado vectorizado
+# =========================
+def _lado_fractal(size):
+    """Menor 2^n+1 que cubre size."""
+    n = max(1, math.ceil(math.log2(max(size - 1, 1))))
+    return 2 ** n + 1
+
+
+def _paso_diamante(mapa, paso, mitad, ruido, bandas):
+    """
+    Paso "diamante": cada centro de cuadrado toma el promedio de sus cuatro
+    esquinas. Se recorre en bandas de 'bandas' filas de centros.
+    """
+    n = (mapa.shape[0] - 1) // paso
+    for i0 in range(0, n, bandas):
+        i1 = min(n, i0 + bandas)
+        arriba = slice(i0 * paso, (i1 - 1) * paso + 1, paso)
+        abajo  = slice((i0 + 1) * paso, i1 * paso + 1, paso)
+        centro = slice(i0 * paso + mitad, (i1 - 1) * paso + mitad + 1, paso)
+
+        centros = mapa[centro, mitad::paso]
+        centros[...] = (
+            mapa[arriba, 0:-1:paso] + mapa[abajo, 0:-1:paso] +
+            mapa[arriba, paso::paso] + mapa[abajo, paso::paso]
+        ) / 4.0 + ruido(centros.shape)
+
+
+def _paso_cuadrado(mapa, paso, mitad, ruido, bandas):
+    """
+    Paso "cuadrado" sobre las celdas de filas x % paso == 0 y columnas
+    y % paso == mitad. Aplicado a mapa.T cubre el otro grupo de celdas.
+    Sus vecinos son esquinas o centros de diamante, nunca otras celdas
+    del mismo paso, así que se calculan todas a la vez (por bandas).
+    """
+    nf = (mapa.shape[0] - 1) // paso + 1
+    for i0 in range(0, nf, bandas):
+        i1 = min(nf, i0 + bandas)
+        filas = slice(i0 * paso, (i1 - 1) * paso + 1, paso)
+
+        objetivo = mapa[filas, mitad::paso]
+        total = mapa[filas, 0:-1:paso] + mapa[filas, paso::paso]
+        contador = np.full(objetivo.shape, 2.0, dtype=mapa.dtype)
+
+        # vecino de arriba (fila i*paso - mitad) para i >= 1
+        a0 = max(i0, 1)
+        if a0 < i1:
+            total[a0 - i0:] += mapa[a0 * paso - mitad:(i1 - 1) * paso - mitad + 1:paso, mitad::paso]
+            contador[a0 - i0:] += 1
+        # vecino de abajo (fila i*paso + mitad) para i < nf - 1
+        b1 = min(i1, nf - 1)
+        if i0 < b1:
+            total[:b1 - i0] += mapa[i0 * paso + mitad:(b1 - 1) * paso + mitad + 1:paso, mitad::paso]
+            contador[:b1 - i0] += 1
+
+        objetivo[...] = total / contador + ruido(objetivo.shape)
+
+
+def _diamante_cuadrado_en(mapa, escala_inicial, rng, rugosidad=0.5, filas_bloque=None):
+    """
+    Rellena 'mapa' (lado 2^n+1, en RAM o memmap) nivel por nivel. Con
+    filas_bloque cada paso se hace por bandas de ~filas_bloque filas del
+    mapa; el ruido se sortea en el mismo orden, así que el resultado no
+    depende del tamaño de banda.
+    """
+    lado = mapa.shape[0]
+    mapa[0, 0] = mapa[0, -1] = mapa[-1, 0] = mapa[-1, -1] = rng.uniform(0.4, 0.6)
+
+    paso = lado - 1
+    escala = escala_inicial
+
+    def ruido(forma):
+        return rng.uniform(-escala, escala, forma).astype(mapa.dtype, copy=False)
+
+    while paso > 1:
+        mitad  = paso // 2
+        bandas = max(1, filas_bloque // paso) if filas_bloque else lado
+
+        _paso_diamante(mapa, paso, mitad, ruido, bandas)
+        # Paso "cuadrado": bordes de cada cuadrado, en filas y en columnas
+        _paso_cuadrado(mapa, paso, mitad, ruido, bandas)
+        _paso_cuadrado(mapa.T, paso, mitad, ruido, bandas)
+
+        paso = mitad
+        escala = escala * rugosidad
+    return mapa
+
+
+def diamante_cuadrado(size, escala_inicial=0.5, semilla=None, rugosidad=0.5,
+                      dtype=np.float64):
+    """
+    Mapa fractal por diamante-cuadrado, recortado a [0,1].
+
+    Cada nivel resuelve el paso "diamante" y el "cuadrado" con slices con
+    salto sobre la grilla completa; el ruido sale de un Generator con
+    'semilla'. Si size no es 2^n+1 se genera el siguiente 2^n+1 y se recorta.
+    """
+    rng  = np.random.default_rng(semilla)
+    lado = _lado_fractal(size)
+    mapa = _diamante_cuadrado_en(
+        np.zeros((lado, lado), dtype=dtype), escala_inicial, rng, rugosidad
+    )
+    mapa = mapa[:size, :size]
+    np.clip(mapa, 0, 1, out=mapa)
+    return np.ascontiguousarray(mapa)
+
+
+def mascara_geologica(mapa):
+    """
+    Atenúa el mapa fuera de un núcleo central y de una fractura diagonal
+    (0.7 * centro + 0.3 * fractura), en el lugar, y lo recorta a [0,1].
+    """
+    size = mapa.shape[0]
+    x = np.linspace(-1, 1, size)
+    X, Y = x[None, :], x[:, None]
+
+    for i in range(0, size, 1024):
+        filas = slice(i, i + 1024)
+        centro   = np.exp(-(X**2 + Y[filas]**2) / 0.5)
+        fractura = np.exp(-((X + Y[filas])**2) / 0.2)
+        mapa[filas] *= 0.7 * centro + 0.3 * fractura
+    np.clip(mapa, 0, 1, out=mapa)
+    return mapa
+
+# =========================
+# Manchas gaussianas por ventanas
+# =========================
+def sortear_manchas(size, num_blobs=5, radio_min=10, radio_max=40, aleatorio=np.random):
+    """
+    Sortea (cx, cy, intensidad, radio) de cada mancha con 'aleatorio'
+    (np.random o un RandomState), en el orden original: centro,
+    intensidad, radio.
+    """
+    manchas = []
+    for _ in range(num_blobs):
+        cx, cy = aleatorio.randint(0, size, 2)
+        intensidad = aleatorio.uniform(0.5, 1.0)
+        radio = aleatorio.randint(radio_min, radio_max)
+        manchas.append((int(cx), int(cy), float(intensidad), int(radio)))
+    return manchas
+
+
+def sumar_manchas(destino, x0, y0, manchas, truncado=4.0):
+    """
+    Suma en 'destino' (la región del mapa que empieza en (x0, y0)) las
+    manchas cuya ventana de ±truncado*radio la toca.
+    """
+    tipo = destino.dtype.type
+    filas, columnas = destino.shape
+    for cx, cy, intensidad, radio in manchas:
+        alcance = int(math.ceil(truncado * radio))
+        a0, a1 = max(x0, cx - alcance), min(x0 + filas, cx + alcance + 1)
+        b0, b1 = max(y0, cy - alcance), min(y0 + columnas, cy + alcance + 1)
+        if a0 >= a1 or b0 >= b1:
+            continue
+
+        gx = np.exp(-((np.arange(a0, a1, dtype=tipo) - cx) ** 2) / (2 * radio**2))
+        gy = np.exp(-((np.arange(b0, b1, dtype=tipo) - cy) ** 2) / (2 * radio**2))
+        destino[a0 - x0:a1 - x0, b0 - y0:b1 - y0] += np.outer(gx * tipo(intensidad), gy)
+    return destino
+
+
+def manchas_gaussianas(size, num_blobs=5, radio_min=10, radio_max=40, truncado=4.0,
+                       dtype=np.float64, aleatorio=np.random):
+    """
+    Suma de num_blobs gaussianas sobre un único buffer size x size.
+
+    Cada mancha solo se evalúa dentro de su ventana de ±truncado*radio
+    (la gaussiana es separable: producto externo de dos perfiles 1D), sin
+    meshgrid. Fuera de la ventana cada mancha aporta menos de
+    intensidad * exp(-truncado**2 / 2): con truncado=4 el error absoluto
+    por mancha es < 3.4e-4 antes de normalizar.
+    """
+    manchas = sortear_manchas(size, num_blobs, radio_min, radio_max, aleatorio)
+    return sumar_manchas(np.zeros((size, size), dtype=dtype), 0, 0, manchas, truncado)
 
 # =========================
 # Generación de un heatmap
@@ -20,6 +301,9 @@ os.makedirs(HEATMAP_DIR, exist_ok=True)
 def generar_heatmap(size, tipo="distancia", **kwargs):
     heatmap = np.zeros((size, size))
     centro = kwargs.get("centro", (size // 2, size // 2))
+    # con 'semilla' los tipos aleatorios usan su propio generador
+    semilla = kwargs.get("semilla")
+    aleatorio = np.random.RandomState(semilla) if semilla is not None else np.random
 
     if tipo == "distancia":
         X, Y = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
@@ -36,34 +320,44 @@ def generar_heatmap(size, tipo="distancia", **kwargs):
         heatmap = (heatmap - heatmap.min()) / (heatmap.max() - heatmap.min())
 
     elif tipo == "random":
-        heatmap = np.random.rand(size, size)
+        heatmap = aleatorio.rand(size, size)
 
     elif tipo == "perlin":
-        if pnoise2 is None:
-            raise ImportError("Instala la librería 'noise' para usar Perlin Noise")
-        escala = kwargs.get("escala", 50.0)
-        octavas = kwargs.get("octavas", 4)
-        for x in range(size):
-            for y in range(size):
-                heatmap[x, y] = pnoise2(x / escala, y / escala, octaves=octavas)
+        heatmap = ruido_perlin(
+            size,
+            escala       = kwargs.get("escala", 50.0),
+            octavas      = kwargs.get("octavas", 4),
+            semilla      = kwargs.get("semilla"),
+            filas_bloque = kwargs.get("filas_bloque")
+        )
         heatmap = (heatmap - heatmap.min()) / (heatmap.max() - heatmap.min())
 
+    elif tipo == "fractal":
+        heatmap = diamante_cuadrado(
+            size,
+            escala_inicial = kwargs.get("escala_inicial", 0.5),
+            semilla        = kwargs.get("semilla"),
+            rugosidad      = kwargs.get("rugosidad", 0.5)
+        )
+        if kwargs.get("mascara", False):
+            heatmap = mascara_geologica(heatmap)
+
     elif tipo == "gradiente":
         x = np.linspace(0, 1, size)
         heatmap = np.tile(x, (size, 1))
 
     elif tipo == "blobs":
-        num_blobs = kwargs.get("num_blobs", 5)
-        radio_min = kwargs.get("radio_min", 10)
-        radio_max = kwargs.get("radio_max", 40)
-        X, Y = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
-        for _ in range(num_blobs):
-            cx, cy = np.random.randint(0, size, 2)
-            intensidad = np.random.uniform(0.5, 1.0)
-            radio = np.random.randint(radio_min, radio_max)
-            dist = np.hypot(X - cx, Y - cy)
-            heatmap += intensidad * np.exp(-(dist**2) / (2 * radio**2))
-        heatmap = (heatmap - heatmap.min()) / (heatmap.max() - heatmap.min())
+        heatmap = manchas_gaussianas(
+            size,
+            num_blobs = kwargs.get("num_blobs", 5),
+            radio_min = kwargs.get("radio_min", 10),
+            radio_max = kwargs.get("radio_max", 40),
+            truncado  = kwargs.get("truncado", 4.0),
+            dtype     = kwargs.get("dtype", np.float64),
+            aleatorio = aleatorio
+        )
+        heatmap -= heatmap.min()
+        heatmap /= heatmap.max()
 
     else:
         raise ValueError(f"Tipo de heatmap '{tipo}' no reconocido")
@@ -71,43 +365,229 @@ def generar_heatmap(size, tipo="distancia", **kwargs):
     return heatmap
 
 
+# =========================
+# Generación por teselas en disco
+# =========================
+# Tipos que se normalizan a [0,1] con el mínimo y el máximo del mapa completo
+NORMALIZADOS = ("distancia_suave", "perlin", "blobs")
+
+
+def _preparar_teselas(tipo, size, kwargs):
+    """Lo que comparten todas las teselas: centro, tabla Perlin, manchas sorteadas."""
+    if tipo in ("distancia", "distancia_suave"):
+        return dict(
+            centro = kwargs.get("centro", (size // 2, size // 2)),
+            sigma  = kwargs.get("sigma", size / 3)
+        )
+    if tipo == "perlin":
+        return dict(
+            perm    = permutacion_perlin(kwargs.get("semilla")),
+            escala  = kwargs.get("escala", 50.0),
+            octavas = kwargs.get("octavas", 4)
+        )
+    if tipo == "blobs":
+        semilla = kwargs.get("semilla")
+        aleatorio = np.random.RandomState(semilla) if semilla is not None else np.random
+        return dict(
+            manchas = sortear_manchas(
+                size,
+                num_blobs = kwargs.get("num_blobs", 5),
+                radio_min = kwargs.get("radio_min", 10),
+                radio_max = kwargs.get("radio_max", 40),
+                aleatorio = aleatorio
+            ),
+            truncado = kwargs.get("truncado", 4.0)
+        )
+    return {}
+
+
+def _tesela(tipo, size, x0, x1, y0, y1, prep, dtype):
+    """Valores sin normalizar del heatmap en [x0:x1, y0:y1]."""
+    if tipo in ("distancia", "distancia_suave"):
+        cx, cy = prep["centro"]
+        dist = np.hypot(np.arange(x0, x1)[:, None] - cx, np.arange(y0, y1)[None, :] - cy)
+        if tipo == "distancia":
+            return 1 / (1 + dist)
+        return np.exp(-(dist**2) / (2 * prep["sigma"]**2))
+    if tipo == "gradiente":
+        x = np.linspace(0, 1, size)[y0:y1]
+        return np.broadcast_to(x, (x1 - x0, y1 - y0))
+    if tipo == "perlin":
+        return perlin_region(x0, x1, y0, y1, prep["escala"], prep["octavas"], prep["perm"])
+    if tipo == "blobs":
+        destino = np.zeros((x1 - x0, y1 - y0), dtype=dtype)
+        return sumar_manchas(destino, x0, y0, prep["manchas"], prep["truncado"])
+    raise ValueError(f"Tipo de heatmap '{tipo}' no reconocido")
+
+
+def _escribir_tesela(path, tipo, size, x0, x1, y0, y1, prep):
+    """Calcula una tesela, la escribe en el .npy y devuelve su (mínimo, máximo)."""
+    destino = np.load(path, mmap_mode="r+")
+    valores = _tesela(tipo, size, x0, x1, y0, y1, prep, destino.dtype)
+    destino[x0:x1, y0:y1] = valores
+    destino.flush()
+    return float(valores.min()), float(valores.max())
+
+
+def _normalizar_tesela(path, x0, x1, y0, y1, minimo, rango):
+    destino = np.load(path, mmap_mode="r+")
+    bloque = np.array(destino[x0:x1, y0:y1])
+    bloque -= minimo
+    bloque /= rango
+    destino[x0:x1, y0:y1] = bloque
+    destino.flush()
+
+
+def _mapear(workers, fn, tareas):
+    """fn(*tarea) para cada tarea, en serie o en un pool de procesos."""
+    if workers <= 1:
+        return [fn(*t) for t in tareas]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, *zip(*tareas)))
+
+
+def generar_heatmap_en_disco(path, size, tipo="distancia", tesela=2048, workers=1, **kwargs):
+    """
+    Genera el heatmap directamente en un .npy en disco (memmap), tesela
+    por tesela, sin tener nunca el mapa completo en RAM. Devuelve el
+    memmap de solo lectura. El resultado coincide con generar_heatmap.
+
+    - tesela: lado de cada tesela (y alto de banda para random y fractal).
+    - workers: procesos que calculan teselas en paralelo. random y fractal
+      se generan en este proceso (su ruido es una única secuencia).
+
+    La normalización a [0,1] se hace en dos pasadas: las teselas devuelven
+    su mínimo y máximo, y luego se reescalan con los extremos globales.
+    """
+    dtype = kwargs.get("dtype", np.float64) if tipo == "blobs" else np.float64
+    destino = open_memmap(path, mode="w+", dtype=dtype, shape=(size, size))
+
+    if tipo == "random":
+        semilla = kwargs.get("semilla")
+        aleatorio = np.random.RandomState(semilla) if semilla is not None else np.random
+        # rand por bandas consume la misma secuencia que rand(size, size)
+        for a in range(0, size, tesela):
+            b = min(size, a + tesela)
+            destino[a:b] = aleatorio.rand(b - a, size)
+
+    elif tipo == "fractal":
+        rng  = np.random.default_rng(kwargs.get("semilla"))
+        lado = _lado_fractal(size)
+        if lado == size:
+            mapa, auxiliar = destino, None
+        else:
+            auxiliar = f"{path}.lado.npy"
+            mapa = open_memmap(auxiliar, mode="w+", dtype=np.float64, shape=(lado, lado))
+        _diamante_cuadrado_en(
+            mapa, kwargs.get("escala_inicial", 0.5), rng,
+            kwargs.get("rugosidad", 0.5), filas_bloque=tesela
+        )
+        for a in range(0, size, tesela):
+            b = min(size, a + tesela)
+            destino[a:b] = np.clip(mapa[a:b, :size], 0, 1)
+        if auxiliar is not None:
+            del mapa
+            os.remove(auxiliar)
+        if kwargs.get("mascara", False):
+            mascara_geologica(destino)
+
+    else:
+        prep = _preparar_teselas(tipo, size, kwargs)
+        destino.flush()
+        teselas = [
+            (x0, min(size, x0 + tesela), y0, min(size, y0 + tesela))
+            for x0 in range(0, size, tesela)
+            for y0 in range(0, size, tesela)
+        ]
+        extremos = _mapear(
+            workers, _escribir_tesela, [(path, tipo, size, *t, prep) for t in teselas]
+        )
+        if tipo in NORMALIZADOS:
+            minimo = min(e[0] for e in extremos)
+            rango  = max(e[1] for e in extremos) - minimo
+            _mapear(
+                workers, _normalizar_tesela, [(path, *t, minimo, rango) for t in teselas]
+            )
+
+    destino.flush()
+    del destino
+    return np.load(path, mmap_mode="r")
+
 # =========================
 # Caché y recarga automática
 # =========================
-def cargar_heatmap(nombre, size, tipo="distancia", **params):
+def cargar_heatmap(nombre, size, tipo="distancia", en_disco=False, workers=1, piramide=False,
+                   **params):
     """
-    Carga de ./heatmaps/{nombre}_{tipo}.npy o genera+guarda si no existe.
+    Carga el heatmap de la caché en disco o lo genera y guarda si no existe.
+
+    La caché se indexa por un hash de (tipo, size, semilla, params): si
+    cambia cualquier parámetro se genera un mapa nuevo en vez de devolver
+    el viejo. El mapa queda registrado en el manifiesto con los nombres
+    lógicos f"{nombre}_{tipo}" y nombre, que usa cargarHeatMap.
+
+    Con en_disco=True el mapa se genera por teselas directo al archivo
+    (ver generar_heatmap_en_disco, con 'workers' procesos) y se devuelve
+    como memmap de solo lectura. El resultado es el mismo, así que comparte
+    la entrada de caché con la generación en RAM.
+
+    Con piramide=True devuelve [mapa, nivel 1, nivel 2, ...]: el mapa y su
+    pirámide de máximos, que se genera junto al mapa si todavía no está
+    (ver piramide.py). Los niveles se abren como memmap.
     """
-    fname = f"{nombre}_{tipo}.npy"
-    path = os.path.join(HEATMAP_DIR, fname)
-    if os.path.exists(path):
-        return np.load(path)
+    clave   = clave_heatmap(tipo, size, params)
+    nombres = (f"{nombre}_{tipo}", nombre)
+    descripcion = dict(tipo=tipo, size=size, **params)
+    path = buscar(clave, nombres)
+    if path is not None:
+        heatmap = np.load(path, mmap_mode="r" if en_disco else None)
 
-    heatmap = generar_heatmap(size, tipo=tipo, **params)
-    np.save(path, heatmap)
+    elif en_disco:
+        path = ruta_de(clave)
+        tmp  = f"{path}.{os.getpid()}.tmp.npy"
+        generar_heatmap_en_disco(tmp, size, tipo=tipo, workers=workers, **params)
+        os.replace(tmp, path)
+        registrar(clave, nombres, descripcion)
+        heatmap = np.load(path, mmap_mode="r")
+
+    else:
+        heatmap = generar_heatmap(size, tipo=tipo, **params)
+        path = guardar(clave, heatmap, nombres, descripcion=descripcion)
+
+    if piramide:
+        return [heatmap] + cargar_piramide(path)[1:]
     return heatmap
 
 # =========================
 # Mostrar múltiples heatmaps
 # =========================
-def mostrar_varios_heatmaps(configs, size, cols=3, cmap="viridis"):
+# lado (en celdas) a partir del cual una miniatura sale de la pirámide
+LADO_MINIATURA = 512
+
+
+def mostrar_varios_heatmaps(configs, size, cols=3, cmap="viridis", lado_miniatura=LADO_MINIATURA):
     """
     configs: lista de dicts con keys: 'nombre', 'tipo', y params opcionales
     size: dimensión de cada heatmap
     cols: número de columnas en la cuadrícula de visualización
+    lado_miniatura: cada mapa se dibuja desde el nivel más chico de su
+        pirámide con al menos este lado, sin cargar el mapa completo
     """
     n = len(configs)
     rows = int(np.ceil(n / cols))
     fig, axes = plt.subplots(rows, cols, figsize=(4*cols, 4*rows))
 
     for ax, cfg in zip(axes.flat, configs):
-        hm = cargar_heatmap(
+        niveles = cargar_heatmap(
             nombre=cfg["nombre"],
             size=size,
             tipo=cfg["tipo"],
+            en_disco=True,
+            piramide=True,
             **{k:v for k,v in cfg.items() if k not in ("nombre","tipo")}
         )
-        ax.imshow(hm, origin="lower", cmap=cmap)
+        hm = nivel_para(niveles, lado_miniatura)
+        ax.imshow(hm, origin="lower", cmap=cmap, extent=(-0.5, size - 0.5, -0.5, size - 0.5))
         ax.set_title(f"{cfg['nombre']} ({cfg['tipo']})")
         ax.axis("off")
 
@@ -132,6 +612,7 @@ if __name__ == "__main__":
         {"nombre": "manchas_peq",    "tipo": "blobs",    "num_blobs": 20, "radio_min": 5,  "radio_max": 20},
         {"nombre": "manchas_med",  "tipo": "blobs",    "num_blobs": 14,  "radio_min": 30, "radio_max": 120},
         {"nombre": "manchas_grand",  "tipo": "blobs",    "num_blobs": 5,  "radio_min": 70, "radio_max": 180},
+        {"nombre": "litio_geologico", "tipo": "fractal", "escala_inicial": 0.5, "mascara": True},
     ]
 
     # =========================
@@ -1,50 +1,239 @@
 import os
 import numpy as np
 import imageio.v2 as imageio
+from PIL import Image, GifImagePlugin
 
-def generar_gif(num_generaciones, carpeta_imgs, nombre_salida, duracion=0.5):
+# índice de paleta reservado para "sin cambios" en los frames delta
+TRANSPARENTE = 255
+
+
+def a_rgb(img):
+    """Normaliza un frame a RGB: escala de grises -> RGB, RGBA -> RGB."""
+    if img.ndim == 2:
+        img = np.stack([img] * 3, axis=-1)
+    elif img.ndim == 3 and img.shape[2] == 4:
+        img = img[..., :3]
+    return img
+
+
+class EscritorGif:
     """
-    Genera un GIF a partir de imágenes PNG numeradas secuencialmente.
+    GIF abierto al que se le agregan frames a medida que se producen.
 
-    - num_generaciones: número máximo de imágenes (0 … num_generaciones-1)
-    - carpeta_imgs:     carpeta donde están las PNG (p. ej. "./gif")
-    - nombre_salida:    ruta/nombre del GIF resultante (debe terminar en .gif)
-    - duracion:         segundos por frame (float; p. ej. 0.5)
+    Cada frame se escribe en el archivo apenas llega, cuantizado con la
+    paleta del primero (el heatmap de fondo no cambia), recortado a la zona
+    que cambió respecto del anterior y con los píxeles repetidos marcados
+    como transparentes. En memoria solo quedan el frame actual y el previo.
+    'duracion' se interpreta igual que en imageio/Pillow.
+
+    Con 'estado' (ruta .npz), marcar() y cerrar() guardan ahí lo necesario
+    para seguir agregando frames más tarde: la paleta, el frame previo y
+    el byte donde termina el último frame. Con continuar=N y un estado de
+    exactamente N frames, el GIF se trunca en ese byte y se sigue desde
+    ahí; si no, se empieza de cero (ver abrir_gif).
     """
-    # Construir rutas esperadas y filtrar las que existen
-    rutas = [
-        os.path.join(carpeta_imgs, f"generacion_{i}.png")
-        for i in range(num_generaciones)
-    ]
+
+    def __init__(self, nombre_salida, duracion=0.5, loop=None, estado=None, continuar=0):
+        self.nombre_salida = nombre_salida
+        self.duracion = duracion
+        self.loop = loop
+        self.estado = estado
+        self.frames = 0
+        self._fp = None
+        if continuar and self._reanudar(continuar):
+            return
+        self._fp = open(nombre_salida, "wb")
+
+    def _reanudar(self, frames):
+        """Retoma el GIF desde el estado guardado si tiene 'frames' frames."""
+        if self.estado is None or not os.path.isfile(self.estado):
+            return False
+        try:
+            with np.load(self.estado) as datos:
+                offset = int(datos["offset"])
+                if int(datos["frames"]) != frames:
+                    return False
+                paleta  = datos["paleta"].tolist()
+                remapeo = datos["remapeo"]
+                previo  = datos["previo"]
+        except (OSError, ValueError, KeyError):
+            return False
+        if not os.path.isfile(self.nombre_salida) or os.path.getsize(self.nombre_salida) < offset:
+            return False
+
+        self._fp = open(self.nombre_salida, "r+b")
+        self._fp.truncate(offset)  # descarta el cierre y frames sin marcar
+        self._fp.seek(offset)
+        self._paleta = Image.new("P", (1, 1))
+        self._paleta.putpalette(paleta)
+        self._remapeo = remapeo
+        self._previo = previo
+        self.frames = frames
+        return True
+
+    def marcar(self):
+        """Vuelca los frames escritos y guarda el estado para poder continuar."""
+        if self.estado is None or self._fp is None or self.frames == 0:
+            return
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        tmp = f"{self.estado}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp,
+            offset  = self._fp.tell(),
+            frames  = self.frames,
+            paleta  = np.asarray(self._paleta.getpalette(), dtype=np.uint8),
+            remapeo = self._remapeo,
+            previo  = self._previo
+        )
+        os.replace(tmp, self.estado)
+
+    def agregar(self, frame):
+        rgb = np.ascontiguousarray(a_rgb(np.asarray(frame)), dtype=np.uint8)
+
+        if self.frames == 0:
+            # 255 colores: el índice 255 queda libre como "transparente"
+            im = Image.fromarray(rgb).convert(
+                "P", palette=Image.Palette.ADAPTIVE, colors=TRANSPARENTE
+            )
+            info = {"duration": self.duracion}
+            if self.loop is not None:
+                info["loop"] = self.loop
+            cabecera, _ = GifImagePlugin.getheader(im, info=info)
+            for bloque in cabecera:
+                self._fp.write(bloque)
+            datos = GifImagePlugin.getdata(im, duration=self.duracion)
+
+            # paleta de referencia: las entradas de relleno repiten el color 0
+            # para que ningún píxel caiga en ellas al cuantizar
+            paleta = im.getpalette()[:3 * TRANSPARENTE]
+            n_colores = len(paleta) // 3
+            self._paleta = Image.new("P", (1, 1))
+            self._paleta.putpalette(paleta + paleta[:3] * (256 - n_colores))
+            self._remapeo = np.arange(256, dtype=np.uint8)
+            self._remapeo[n_colores:] = 0
+        else:
+            # solo se escribe el rectángulo que cambió respecto del frame previo
+            cambio = np.any(rgb != self._previo, axis=2)
+            filas = np.flatnonzero(cambio.any(axis=1))
+            cols  = np.flatnonzero(cambio.any(axis=0))
+            if filas.size:
+                y0, y1 = filas[0], filas[-1] + 1
+                x0, x1 = cols[0], cols[-1] + 1
+            else:
+                y0, y1, x0, x1 = 0, 1, 0, 1
+
+            recorte = Image.fromarray(np.ascontiguousarray(rgb[y0:y1, x0:x1]))
+            idx = np.asarray(recorte.quantize(palette=self._paleta, dither=Image.Dither.NONE))
+            idx = self._remapeo[idx]
+            # los píxeles que no cambiaron se dejan transparentes
+            idx[~cambio[y0:y1, x0:x1]] = TRANSPARENTE
+
+            im = Image.fromarray(idx, mode="P")
+            im.putpalette(self._paleta.getpalette())
+            datos = GifImagePlugin.getdata(
+                im, offset=(int(x0), int(y0)),
+                duration=self.duracion, transparency=TRANSPARENTE
+            )
+        for bloque in datos:
+            self._fp.write(bloque)
+        # copia: quien llama puede reutilizar su buffer para el próximo frame
+        self._previo = rgb.copy()
+        self.frames += 1
+
+    def cerrar(self):
+        if self._fp is None:
+            return
+        self.marcar()
+        self._fp.write(b";")  # fin del GIF
+        self._fp.close()
+        self._fp = None
+        self._previo = self._paleta = None
+        print(f"GIF generado: {self.nombre_salida} — {self.frames} frames, {self.duracion}s/frame")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def ruta_frame(carpeta_imgs, gen):
+    return os.path.join(carpeta_imgs, f"generacion_{gen}.png")
+
+
+def indices_frames(carpeta_imgs, num_generaciones):
+    """Generaciones i < num_generaciones con generacion_{i}.png, en orden."""
+    indices = []
+    if os.path.isdir(carpeta_imgs):
+        for archivo in os.listdir(carpeta_imgs):
+            nombre, ext = os.path.splitext(archivo)
+            if ext == ".png" and nombre.startswith("generacion_"):
+                sufijo = nombre[len("generacion_"):]
+                if sufijo.isdigit() and int(sufijo) < num_generaciones:
+                    indices.append(int(sufijo))
+    return sorted(indices)
+
+
+def _existentes(rutas):
+    """Las rutas que existen; avisa por las que faltan."""
     rutas_existentes = []
     for ruta in rutas:
         if os.path.isfile(ruta):
             rutas_existentes.append(ruta)
         else:
             print(f"Aviso: no se encontró {ruta}, se omitirá")
+    return rutas_existentes
+
+
+def abrir_gif(nombre_salida, duracion=0.5, loop=None, estado=None, desde=0, previos=None):
+    """
+    EscritorGif listo para recibir su frame número 'desde'.
 
-    if not rutas_existentes:
+    Si el estado guardado corresponde a 'desde' frames, sigue el GIF
+    existente sin reescribirlo. Si no (no hay estado, o quedó de otro
+    punto de la corrida), arma los primeros frames de nuevo a partir de
+    'previos' (rutas de los PNG de esos frames).
+    """
+    escritor = EscritorGif(
+        nombre_salida, duracion=duracion, loop=loop, estado=estado, continuar=desde
+    )
+    if escritor.frames != desde and previos is not None:
+        for ruta in _existentes(previos):
+            escritor.agregar(imageio.imread(ruta))
+    if escritor.frames != desde:
+        print(f"Aviso: {nombre_salida} sigue desde {escritor.frames} frames en vez de {desde}")
+    return escritor
+
+
+def generar_gif(num_generaciones, carpeta_imgs, nombre_salida, duracion=0.5,
+                desde=0, estado=None, indices=None):
+    """
+    Genera un GIF a partir de imágenes PNG numeradas por generación.
+
+    - num_generaciones: número máximo de imágenes (0 … num_generaciones-1)
+    - carpeta_imgs:     carpeta donde están las PNG (p. ej. "./gif")
+    - nombre_salida:    ruta/nombre del GIF resultante (debe terminar en .gif)
+    - duracion:         segundos por frame (float; p. ej. 0.5)
+    - indices:          generaciones que tienen frame, en orden (p. ej. una
+                        de cada k); por defecto, las generacion_{i}.png que
+                        haya en la carpeta, sin avisar por los huecos
+    - desde, estado:    para extender un GIF ya generado: los primeros
+                        'desde' frames ya están en él (ver abrir_gif)
+    """
+    if indices is None:
+        indices = indices_frames(carpeta_imgs, num_generaciones)
+    rutas = [ruta_frame(carpeta_imgs, i) for i in indices if i < num_generaciones]
+    nuevas = _existentes(rutas[desde:])
+    if not nuevas and not desde:
         print("Error: no hay imágenes válidas para generar el GIF.")
         return
 
-    # Leer y normalizar canales (RGB)
-    frames = []
-    for ruta in rutas_existentes:
-        img = imageio.imread(ruta)
-        # Escala de grises -> RGB
-        if img.ndim == 2:
-            img = np.stack([img] * 3, axis=-1)
-        # RGBA -> RGB (descarta canal alpha)
-        elif img.ndim == 3 and img.shape[2] == 4:
-            img = img[..., :3]
-        frames.append(img)
-
-    # Escribir el GIF
-    with imageio.get_writer(nombre_salida, mode='I', duration=duracion) as writer:
-        for frame in frames:
-            writer.append_data(frame)
-
-    print(f"GIF generado: {nombre_salida} — {len(frames)} frames, {duracion}s/frame")
+    # Leer y escribir de a un frame: en memoria nunca hay más de una imagen
+    with abrir_gif(nombre_salida, duracion, estado=estado, desde=desde,
+                   previos=rutas[:desde]) as escritor:
+        for ruta in nuevas:
+            escritor.agregar(imageio.imread(ruta))
 
 
 if __name__ == "__main__":
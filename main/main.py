@@ -1,8 +1,14 @@
 import os
-import math
+import time
+import zlib
 import random
 import json
+import cProfile
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import imageio.v2 as imageio
 
 from algoritmo import (
     generar_pozos_aleatorios,
@@ -10,109 +16,287 @@ from algoritmo import (
     cruce_interno_centro,
     seleccionar_poblacion
 )
-from visualizacion import mostrar_varios_conjuntos
-from cargarHeatMap import cargar_heatmap
-from generarGif import generar_gif
-
-def fitness_con_penalizacion(p, heatmap, poblacion, dist_min, penal_max):
-    base = heatmap[p[0], p[1]]
-    penal = 0
-    for q in poblacion:
-        q_pt = q[0] if isinstance(q[0], tuple) else q
-        d = math.hypot(p[0] - q_pt[0], p[1] - q_pt[1])
-        if d < dist_min:
-            penal += penal_max * (1 - d / dist_min)
-    return base - penal
-
-def main(config_path):
-    # Leer escenarios del JSON
-    with open(config_path, 'r', encoding='utf-8') as f:
-        escenarios = json.load(f)
+from render import PipelineRender
+from cargarHeatMap import (
+    cargar_heatmap,
+    cargar_piramide,
+    compartir_heatmap,
+    adjuntar_heatmap,
+    liberar_compartidos
+)
+from generarGif import generar_gif, abrir_gif
+from fitness import fitness_con_penalizacion, EvaluadorFitness
+from poblacion import Poblacion
+from piramide import refinar, a_escala_base
+from checkpoint import hash_escenario, ruta_checkpoint, guardar_checkpoint, cargar_checkpoint
+from metricas import RegistroMetricas, METRICAS_DIR
+import perfil
+from perfil import fase
 
-    base = os.path.splitext(os.path.basename(config_path))[0]
+PERFIL_DIR = "./perfil"
 
-    # Directorios raíz únicos
-    img_root = "./img"
-    gif_root = "./gif"
-    os.makedirs(img_root, exist_ok=True)
-    os.makedirs(gif_root, exist_ok=True)
 
-    for cfg in escenarios:
-        nombre = cfg["nombre"]
+def semilla_escenario(base, indice, cfg, semilla_base=0):
+    """
+    Semilla determinista de un escenario: la del JSON ('semilla') si existe,
+    o un hash estable del archivo de configuración, su posición y su nombre.
+    """
+    if "semilla" in cfg:
+        return int(cfg["semilla"]) + semilla_base
+    clave = f"{base}:{indice}:{cfg['nombre']}".encode("utf-8")
+    return zlib.crc32(clave) + semilla_base
+
+
+# =========================
+# Políticas de salida
+# =========================
+# full:    un frame por generación y GIF (lo de siempre)
+# every_k: un frame cada 'salida_cada' generaciones más el último, y GIF
+# final:   solo el PNG de la última generación, sin GIF
+# none:    ni frames ni GIF; matplotlib ni siquiera se importa
+POLITICAS_SALIDA = ("full", "every_k", "final", "none")
+
 
-        # Carpeta para las imágenes de este escenario
-        carpeta_imgs = os.path.join(img_root, base, nombre)
+def lleva_frame(politica, gen, generaciones, cada=10):
+    """¿La generación 'gen' se dibuja con esta política de salida?"""
+    if politica == "full":
+        return True
+    if politica == "every_k":
+        return gen % cada == 0 or gen == generaciones - 1
+    if politica == "final":
+        return gen == generaciones - 1
+    if politica == "none":
+        return False
+    raise ValueError(f"Política de salida desconocida: {politica}")
+
+
+# =========================
+# Grueso a fino
+# =========================
+# Con "niveles_piramide": k en el JSON, las primeras generaciones corren
+# sobre la pirámide de máximos del heatmap (ver piramide.py): las
+# "generaciones_piramide" primeras en el nivel k, las siguientes en el
+# k-1, ..., y el resto en el mapa completo. Al bajar de nivel cada pozo
+# pasa a la mejor celda de su bloque en el nivel más fino.
+def nivel_de(gen, niveles, generaciones_por_nivel):
+    """Nivel de la pirámide en el que corre la generación 'gen'."""
+    return max(0, niveles - gen // generaciones_por_nivel)
+
+
+def ejecutar_escenario(cfg, base, img_root, gif_root, semilla, heatmap=None, render=None,
+                       gif_directo=False, guardar_png=True, checkpoint=None,
+                       checkpoint_cada=10, reanudar=False, traza=None, metricas=None,
+                       salida="full", salida_cada=10):
+    """
+    Ejecuta un escenario completo (evolución, PNGs y GIF).
+    Con 'render' (PipelineRender) los frames y el GIF se delegan a la etapa
+    de render en segundo plano; si no, se dibujan aquí reutilizando una
+    sola figura. Con gif_directo cada frame va directo al GIF abierto y los
+    PNG por generación solo se escriben si guardar_png.
+
+    'salida' es la política de salida (ver POLITICAS_SALIDA): qué
+    generaciones se dibujan y si se arma el GIF.
+
+    Con 'checkpoint' (ruta .npz) el estado de la evolución se guarda cada
+    'checkpoint_cada' generaciones y al final. Con reanudar, si hay un
+    checkpoint válido de este escenario, la evolución sigue desde ahí
+    hasta 'generaciones' y los frames nuevos se agregan al GIF existente.
+
+    Con 'traza' (ruta .jsonl) se mide cada fase del bucle y de los
+    operadores y se escribe una línea JSON por generación.
+
+    Con 'metricas' (ruta .csv) se registran por generación el mínimo, el
+    máximo, la media y el desvío del fitness, la diversidad, las celdas
+    únicas y el mejor individuo (ver RegistroMetricas).
+
+    Con "niveles_piramide" en cfg la evolución va de grueso a fino (ver
+    nivel_de). Los frames y las métricas de los niveles gruesos usan
+    coordenadas del mapa completo; el checkpoint guarda las del nivel.
+
+    Devuelve (segundos de reloj de la evolución, estadísticas de la caché
+    de fitness, resumen del perfil o None).
+    """
+    t0 = time.perf_counter()
+    nombre = cfg["nombre"]
+    lleva_frame(salida, 0, 1, salida_cada)  # valida la política antes de correr
+    con_gif = salida in ("full", "every_k")
+    directo = gif_directo and con_gif
+    medidor = perfil.activar() if traza is not None else None
+    if medidor is not None:
+        os.makedirs(os.path.dirname(traza), exist_ok=True)
+        archivo_traza = open(traza, "w", encoding="utf-8")
+
+    # Carpeta para las imágenes de este escenario
+    carpeta_imgs = os.path.join(img_root, base, nombre)
+    if salida != "none":
         os.makedirs(carpeta_imgs, exist_ok=True)
 
+    if heatmap is None:
         heatmap = cargar_heatmap(nombre)
-        size    = heatmap.shape[0]
-
-        puntos       = cfg["puntos"]
-        generaciones = cfg["generaciones"]
-        jitter       = cfg["jitter"]
-        porc_sel     = cfg["porcentaje_seleccion"]
-        num_sel      = cfg["num_seleccionados"]
-        dist_min     = cfg["distancia_min"]
-        penal_max    = cfg["penalizacion_max"]
-
-        # Población inicial según modo
-        if cfg["modo"] == "equidistantes":
-            pozos, poblacion = generar_pozos_equidistantes(
-                num_pozos     = puntos,
-                grid_size     = size,
-                fitness_fn    = lambda p: fitness_con_penalizacion(
-                    p, heatmap, [], dist_min, penal_max
-                ),
-                distancia_min = dist_min
-            )
-        else:
-            pozos, poblacion = generar_pozos_aleatorios(
-                n_pozos    = puntos,
-                size       = size,
-                fitness_fn = lambda p: fitness_con_penalizacion(
-                    p, heatmap, [], dist_min, penal_max
-                )
+    size = heatmap.shape[0]
+
+    # Semillas propias del escenario: misma secuencia en serie y en paralelo
+    random.seed(semilla)
+    rng = np.random.default_rng(semilla)
+
+    puntos       = cfg["puntos"]
+    generaciones = cfg["generaciones"]
+    jitter       = cfg["jitter"]
+    porc_sel     = cfg["porcentaje_seleccion"]
+    num_sel      = cfg["num_seleccionados"]
+    dist_min     = cfg["distancia_min"]
+    penal_max    = cfg["penalizacion_max"]
+
+    # Niveles de la pirámide para ir de grueso a fino
+    mapas, niveles, gen_nivel = [heatmap], 0, 1
+    if cfg.get("niveles_piramide", 0) > 0:
+        mapas = [heatmap] + cargar_piramide(nombre, mmap_mode="r")[1:]
+        niveles = min(cfg["niveles_piramide"], len(mapas) - 1)
+        gen_nivel = cfg.get("generaciones_piramide") or max(1, generaciones // (2 * max(niveles, 1)))
+
+    def en_nivel(n):
+        """(mapa, lado, distancia mínima, jitter) del nivel n."""
+        if n == 0:
+            return heatmap, size, dist_min, jitter
+        factor = 2 ** n
+        return mapas[n], mapas[n].shape[0], dist_min / factor, jitter / factor
+
+    def en_base(p):
+        """La población p en coordenadas del mapa completo."""
+        if nivel == 0:
+            return p
+        return Poblacion(a_escala_base(p.coords, nivel, size), p.fitness, p.edad)
+
+    # Retomar desde el último checkpoint (restaura también los RNG)
+    clave = hash_escenario(cfg, semilla)
+    gen0  = 0
+    frames = []   # generaciones que ya tienen frame
+    reanudado = None
+    if checkpoint is not None and reanudar:
+        reanudado = cargar_checkpoint(checkpoint, rng, clave)
+    if reanudado is not None:
+        poblacion, gen0, frames = reanudado
+        print(f"{nombre}: se retoma desde la generación {gen0}")
+        # Al extender una corrida, su último frame forzado (la última
+        # generación con every_k o final) puede no tocarle a la nueva: se
+        # saca para que el GIF quede igual al de una corrida sin cortes.
+        # Sin PNG no se puede rearmar el GIF sin él, y ahí se conserva.
+        if frames and not lleva_frame(salida, frames[-1], generaciones, salida_cada) \
+                and (guardar_png or not con_gif):
+            frames.pop()
+
+    # Nivel de la población (la del checkpoint quedó en el de gen0 - 1)
+    nivel = nivel_de(max(gen0 - 1, 0), niveles, gen_nivel)
+    mapa, lado, dist, jit = en_nivel(nivel)
+
+    # Fitness con caché por población de referencia
+    evaluador = EvaluadorFitness(mapa, dist, penal_max)
+
+    # Población inicial según modo
+    if reanudado is None and cfg["modo"] == "equidistantes":
+        pozos, poblacion = generar_pozos_equidistantes(
+            num_pozos     = puntos,
+            grid_size     = lado,
+            fitness_fn    = lambda p: fitness_con_penalizacion(
+                p, mapa, [], dist, penal_max
+            ),
+            distancia_min = dist
+        )
+    elif reanudado is None:
+        pozos, poblacion = generar_pozos_aleatorios(
+            n_pozos    = puntos,
+            size       = lado,
+            fitness_fn = lambda p: fitness_con_penalizacion(
+                p, mapa, [], dist, penal_max
             )
+        )
 
-        # Evolución
-        for gen in range(generaciones):
-            # Recalcular fitness y ordenar
-            poblacion = [
-                (pt, fitness_con_penalizacion(pt, heatmap, poblacion, dist_min, penal_max))
-                for pt, _ in poblacion
-            ]
-            poblacion.sort(key=lambda x: x[1], reverse=True)
-
-            # Selección
-            if porc_sel < 100:
-                n_sel = max(2, int(len(poblacion) * porc_sel / 100))
-            else:
-                n_sel = min(num_sel, len(poblacion))
-            seleccionados = poblacion[:n_sel]
+    registro = None
+    if metricas is not None:
+        registro = RegistroMetricas(metricas, desde=gen0)
+
+    # lo de la población inicial cuenta en el total pero no en la traza
+    if medidor is not None:
+        medidor.cerrar_generacion()
 
-            # Cruce interno
+    # GIF final en /gif/<base>/<nombre>.gif
+    salida_gif = os.path.join(gif_root, base, f"{nombre}.gif")
+    if con_gif:
+        os.makedirs(os.path.dirname(salida_gif), exist_ok=True)
+    duracion = 400
+
+    # Estado del GIF junto al checkpoint, para poder seguir agregándole frames
+    estado_gif = None
+    if checkpoint is not None:
+        os.makedirs(os.path.dirname(checkpoint), exist_ok=True)
+        estado_gif = f"{os.path.splitext(checkpoint)[0]}.gif.npz"
+    previos = [os.path.join(carpeta_imgs, f"generacion_{g}.png") for g in frames]
+    gif = dict(
+        nombre_salida = salida_gif,
+        duracion      = duracion,
+        estado        = estado_gif,
+        desde         = len(frames),
+        previos       = previos if guardar_png else None
+    )
+
+    if render is None and salida != "none":
+        # import diferido: con salida "none" no se carga matplotlib
+        from visualizacion import LienzoConjuntos
+        lienzo = LienzoConjuntos(size, n_conjuntos=2, heatmap=heatmap)
+        if directo:
+            escritor = abrir_gif(**gif)
+
+    # Evolución
+    for gen in range(gen0, generaciones):
+        t_gen = time.perf_counter()
+        # Grueso a fino: al bajar de nivel la población se refina
+        while nivel > nivel_de(gen, niveles, gen_nivel):
+            nivel -= 1
+            mapa, lado, dist, jit = en_nivel(nivel)
+            poblacion = Poblacion(refinar(poblacion.coords, mapa), edad=poblacion.edad)
+            evaluador.cambiar_mapa(mapa, dist)
+
+        # Recalcular fitness y ordenar
+        with fase("fitness"):
+            fits = evaluador.evaluar(poblacion.coords, poblacion)
+            poblacion = poblacion.con_fitness(fits).ordenada()
+        if registro is not None:
+            registro.agregar(gen, poblacion.fitness, en_base(poblacion).coords)
+
+        # Selección
+        if porc_sel < 100:
+            n_sel = max(2, int(len(poblacion) * porc_sel / 100))
+        else:
+            n_sel = min(num_sel, len(poblacion))
+        seleccionados = poblacion[:n_sel]
+
+        # Cruce interno
+        with fase("cruce"):
             nuevos = cruce_interno_centro(
                 seleccionados,
-                size           = size,
+                size           = lado,
                 metodo         = cfg["metodo"],
                 tipo_centro    = cfg["tipo_centro"],
                 fitness_fn     = lambda p: fitness_con_penalizacion(
-                    p, heatmap, seleccionados, dist_min, penal_max
+                    p, mapa, seleccionados, dist, penal_max
                 ),
-                jitter         = jitter,
+                fitness_lote_fn = lambda pts: evaluador.evaluar(pts, seleccionados),
+                jitter         = jit,
                 peso_fitness   = 1.0,
                 peso_distancia = 2.0,
-                dist_min       = dist_min,
-                penal_max      = penal_max
+                dist_min       = dist,
+                penal_max      = penal_max,
+                vecindad       = cfg.get("vecindad"),
+                rng            = rng
             )
-            # Normalizar fitness en nuevos
-            nuevos = [
-                (pt, fitness_con_penalizacion(pt, heatmap, seleccionados, dist_min, penal_max))
-                for pt, _ in nuevos
-            ]
-
-            # Preparar siguiente población
-            candidatos = seleccionados + nuevos
+        # Normalizar fitness en nuevos (misma referencia: sale de la caché)
+        with fase("fitness_hijos"):
+            nuevos = nuevos.con_fitness(evaluador.evaluar(nuevos.coords, seleccionados))
+
+        # Preparar siguiente población
+        with fase("seleccion"):
+            # los seleccionados sobreviven una generación más; los hijos nacen con edad 0
+            candidatos = seleccionados.envejecer() + nuevos
             poblacion  = seleccionar_poblacion(
                 candidatos,
                 puntos    = puntos,
@@ -120,29 +304,243 @@ def main(config_path):
                 aleatorio = cfg["aleatorio"]
             )
 
-            # Guardar PNG
-            mostrar_varios_conjuntos(
-                [seleccionados, nuevos],
-                size         = size,
-                etiquetas    = ["Seleccionados", "Nuevos"],
-                titulo       = f"{nombre} - Gen {gen}",
-                heatmap      = heatmap,
-                guardar_como = os.path.join(carpeta_imgs, f"generacion_{gen}.png")
+        # Guardar frame (PNG y/o directo al GIF) según la política de salida
+        if lleva_frame(salida, gen, generaciones, salida_cada):
+            ruta_png = os.path.join(carpeta_imgs, f"generacion_{gen}.png")
+            if not guardar_png and salida != "final":
+                ruta_png = None
+            with fase("render"):
+                conjuntos = [en_base(seleccionados), en_base(nuevos)]
+                if render is not None:
+                    render.enviar(carpeta_imgs, nombre, size, conjuntos, ruta_png,
+                                  gif=gif if directo else None)
+                elif directo:
+                    frame = lienzo.rgba(conjuntos)
+                    if ruta_png:
+                        imageio.imwrite(ruta_png, frame)
+                    escritor.agregar(frame)
+                else:
+                    lienzo.dibujar(conjuntos, ruta_png)
+            frames.append(gen)
+
+        # Checkpoint: antes, los frames hasta 'gen' tienen que estar en disco
+        if checkpoint is not None and (
+            (gen + 1) % checkpoint_cada == 0 or gen + 1 == generaciones
+        ):
+            with fase("checkpoint"):
+                if render is not None:
+                    if directo:
+                        render.marcar_gif(carpeta_imgs)
+                    render.esperar(carpeta_imgs)
+                elif directo:
+                    escritor.marcar()
+                if registro is not None:
+                    registro.volcar()
+                guardar_checkpoint(checkpoint, poblacion, gen + 1, rng, clave, frames)
+
+        if medidor is not None:
+            fases_gen = medidor.cerrar_generacion()
+            archivo_traza.write(json.dumps({
+                "escenario":  nombre,
+                "generacion": gen,
+                "nivel":      nivel,
+                "segundos":   round(time.perf_counter() - t_gen, 6),
+                "poblacion":  len(poblacion),
+                "hijos":      len(nuevos),
+                **fases_gen
+            }) + "\n")
+
+    # Cerrar el GIF final (solo con las generaciones que tienen frame)
+    gif_kwargs = dict(
+        num_generaciones = generaciones,
+        carpeta_imgs     = carpeta_imgs,
+        nombre_salida    = salida_gif,
+        duracion         = duracion,
+        desde            = gif["desde"],
+        estado           = estado_gif,
+        indices          = frames
+    )
+    segundos = time.perf_counter() - t0
+    if con_gif and render is not None:
+        if directo:
+            render.cerrar_gif(carpeta_imgs)
+        else:
+            render.encolar_gif(carpeta_imgs, **gif_kwargs)
+    elif con_gif:
+        with fase("gif"):
+            if directo:
+                escritor.cerrar()
+            else:
+                generar_gif(**gif_kwargs)
+        segundos = time.perf_counter() - t0
+
+    if registro is not None:
+        registro.cerrar()
+    resumen = None
+    if medidor is not None:
+        resumen = medidor.resumen()
+        archivo_traza.close()
+        perfil.desactivar()
+    return segundos, evaluador.estadisticas(), resumen
+
+
+def ejecutar_grupo(tareas, base, img_root, gif_root, render=None, render_workers=0,
+                   gif_directo=False, guardar_png=True, mmap_mode=None, compartido=None,
+                   checkpoint_cada=10, reanudar=False, perfilar=False, cprofile=None,
+                   metricas=True, salida=None, salida_cada=None):
+    """
+    Ejecuta en orden los escenarios de un grupo que comparten heatmap,
+    cargándolo una sola vez. tareas = [(indice, cfg, semilla), ...]
+    Si no se pasa 'render' y render_workers > 0, el grupo abre su propia
+    etapa de render y la cierra al terminar.
+
+    El heatmap sale de 'compartido' (HeatmapCompartido, sin copia) si se
+    pasa; si no, de cargar_heatmap con el mmap_mode indicado.
+    Con checkpoint_cada > 0 cada escenario guarda su checkpoint en
+    ruta_checkpoint(base, indice, nombre).
+    Con perfilar, la traza de cada escenario va a
+    PERFIL_DIR/<base>/<indice>_<nombre>.jsonl; el escenario cuyo nombre o
+    índice es 'cprofile' además se corre bajo cProfile (mismo nombre, .prof).
+    Con metricas, las estadísticas por generación van a
+    METRICAS_DIR/<base>/<indice>_<nombre>.csv.
+    'salida' y 'salida_cada', si se pasan, reemplazan a los del JSON
+    (por defecto "full" y 10).
+    Devuelve [(indice, nombre, segundos, estadisticas_cache, perfil), ...].
+    """
+    propio = render is None and render_workers > 0
+    if propio:
+        render = PipelineRender(workers=render_workers)
+
+    if compartido is not None:
+        heatmap = adjuntar_heatmap(compartido)
+    else:
+        heatmap = cargar_heatmap(tareas[0][1]["nombre"], mmap_mode=mmap_mode)
+    tiempos = []
+    try:
+        for indice, cfg, semilla in tareas:
+            png = guardar_png and cfg.get("guardar_png", True)
+            prefijo = os.path.join(PERFIL_DIR, base, f"{indice}_{cfg['nombre']}")
+            perfilador = None
+            if cprofile is not None and cprofile in (cfg["nombre"], str(indice)):
+                perfilador = cProfile.Profile()
+                perfilador.enable()
+            seg, cache, resumen = ejecutar_escenario(
+                cfg, base, img_root, gif_root, semilla, heatmap=heatmap, render=render,
+                gif_directo = gif_directo or not png,
+                guardar_png = png,
+                checkpoint  = (
+                    ruta_checkpoint(base, indice, cfg["nombre"]) if checkpoint_cada > 0 else None
+                ),
+                checkpoint_cada = checkpoint_cada,
+                reanudar        = reanudar,
+                traza           = f"{prefijo}.jsonl" if perfilar else None,
+                metricas        = (
+                    os.path.join(METRICAS_DIR, base, f"{indice}_{cfg['nombre']}.csv")
+                    if metricas else None
+                ),
+                salida          = salida or cfg.get("salida", "full"),
+                salida_cada     = salida_cada or cfg.get("salida_cada", 10)
             )
+            if perfilador is not None:
+                perfilador.disable()
+                os.makedirs(os.path.dirname(prefijo), exist_ok=True)
+                perfilador.dump_stats(f"{prefijo}.prof")
+                print(f"cProfile de {cfg['nombre']}: {prefijo}.prof")
+            tiempos.append((indice, cfg["nombre"], seg, cache, resumen))
+    finally:
+        if propio:
+            render.cerrar()
+    return tiempos
 
-        # Guardar GIF final en /gif/<base>/<nombre>.gif
-        salida_gif = os.path.join(gif_root, base, f"{nombre}.gif")
-        os.makedirs(os.path.dirname(salida_gif), exist_ok=True)
-        generar_gif(
-            num_generaciones = generaciones,
-            carpeta_imgs     = carpeta_imgs,
-            nombre_salida    = salida_gif,
-            duracion         = 400
+
+def main(config_path, workers=1, semilla_base=0, render_workers=0,
+         gif_directo=False, guardar_png=True, memoria_compartida=False, mmap=False,
+         checkpoint_cada=10, reanudar=False, perfilar=False, cprofile=None, metricas=True,
+         salida=None, salida_cada=None):
+    # Leer escenarios del JSON
+    with open(config_path, 'r', encoding='utf-8') as f:
+        escenarios = json.load(f)
+
+    base = os.path.splitext(os.path.basename(config_path))[0]
+
+    # Directorios raíz únicos
+    img_root = "./img"
+    gif_root = "./gif"
+    os.makedirs(img_root, exist_ok=True)
+    os.makedirs(gif_root, exist_ok=True)
+
+    # Agrupar por heatmap: cada grupo corre en un único worker, así el mapa
+    # se carga una vez y los escenarios que comparten carpeta no se pisan
+    grupos = {}
+    for indice, cfg in enumerate(escenarios):
+        semilla = semilla_escenario(base, indice, cfg, semilla_base)
+        grupos.setdefault(cfg["nombre"], []).append((indice, cfg, semilla))
+
+    t0 = time.perf_counter()
+    tiempos = []
+    if workers <= 1:
+        # una sola etapa de render para toda la corrida
+        render = PipelineRender(workers=render_workers) if render_workers > 0 else None
+        try:
+            for tareas in grupos.values():
+                tiempos.extend(ejecutar_grupo(
+                    tareas, base, img_root, gif_root, render=render,
+                    gif_directo=gif_directo, guardar_png=guardar_png,
+                    mmap_mode="r" if mmap else None,
+                    checkpoint_cada=checkpoint_cada, reanudar=reanudar,
+                    perfilar=perfilar, cprofile=cprofile, metricas=metricas,
+                    salida=salida, salida_cada=salida_cada
+                ))
+        finally:
+            if render is not None:
+                render.cerrar()
+    else:
+        # Los workers no copian el heatmap: lo abren como memmap (páginas
+        # compartidas por el SO) o se adjuntan a un segmento compartido
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futuros = [
+                    pool.submit(
+                        ejecutar_grupo, tareas, base, img_root, gif_root,
+                        render_workers = render_workers,
+                        gif_directo    = gif_directo,
+                        guardar_png    = guardar_png,
+                        mmap_mode      = "r",
+                        compartido     = compartir_heatmap(nombre) if memoria_compartida else None,
+                        checkpoint_cada = checkpoint_cada,
+                        reanudar        = reanudar,
+                        perfilar        = perfilar,
+                        cprofile        = cprofile,
+                        metricas        = metricas,
+                        salida          = salida,
+                        salida_cada     = salida_cada
+                    )
+                    for nombre, tareas in grupos.items()
+                ]
+                for futuro in as_completed(futuros):
+                    tiempos.extend(futuro.result())
+        finally:
+            liberar_compartidos()
+    total = time.perf_counter() - t0
+
+    # Resumen de tiempos
+    print(f"{'#':>3}  {'Escenario':<40} {'Tiempo (s)':>10} {'Caché fitness':>24}")
+    for indice, nombre, seg, cache, _ in sorted(tiempos, key=lambda t: t[0]):
+        ahorro = f"{cache['fallos']}/{cache['consultas']} ({cache['ahorro']:.0%} ahorro)"
+        print(f"{indice:>3}  {nombre:<40} {seg:>10.2f} {ahorro:>24}")
+    print(f"     {'Total (reloj)':<40} {total:>10.2f}")
+
+    if perfilar:
+        perfil.imprimir_resumen(
+            perfil.sumar_resumenes(t[4] for t in tiempos),
+            titulo=f"Perfil de {len(tiempos)} escenarios (trazas en {PERFIL_DIR}/{base}/)"
         )
 
     print(f"✅ Ejecutado {config_path}")
     print(f"– Imágenes en: {img_root}/{base}/...")
     print(f"– GIFs en:     {gif_root}/{base}/...")
+    if metricas:
+        print(f"– Métricas en: {METRICAS_DIR}/{base}/...")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -152,5 +550,78 @@ if __name__ == "__main__":
         "config",
         help="Ruta al JSON de escenarios"
     )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Procesos para ejecutar escenarios en paralelo (1 = en serie)"
+    )
+    parser.add_argument(
+        "--semilla", type=int, default=0,
+        help="Semilla base que se suma a la semilla de cada escenario"
+    )
+    parser.add_argument(
+        "--render-workers", type=int, default=0,
+        help="Procesos de render en segundo plano (0 = dibujar en el bucle)"
+    )
+    parser.add_argument(
+        "--gif-directo", action="store_true",
+        help="Agrega cada frame directo al GIF, sin releer PNGs"
+    )
+    parser.add_argument(
+        "--sin-png", action="store_true",
+        help="No escribe los PNG por generación (implica --gif-directo)"
+    )
+    parser.add_argument(
+        "--memoria-compartida", action="store_true",
+        help="Con --workers, pasa los heatmaps por memoria compartida en vez de memmap"
+    )
+    parser.add_argument(
+        "--mmap", action="store_true",
+        help="En serie, abre los heatmaps como memmap en vez de cargarlos en RAM"
+    )
+    parser.add_argument(
+        "--checkpoint-cada", type=int, default=10,
+        help="Guarda un checkpoint de cada escenario cada K generaciones (0 = nunca)"
+    )
+    parser.add_argument(
+        "--reanudar", "--resume", action="store_true",
+        help="Sigue cada escenario desde su último checkpoint válido hasta 'generaciones'"
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Mide cada fase: traza JSONL por generación y tabla resumen al final"
+    )
+    parser.add_argument(
+        "--cprofile", metavar="ESCENARIO",
+        help="Corre bajo cProfile el escenario con ese nombre o índice"
+    )
+    parser.add_argument(
+        "--sin-metricas", action="store_true",
+        help="No registra las estadísticas de fitness por generación"
+    )
+    parser.add_argument(
+        "--salida", choices=POLITICAS_SALIDA,
+        help="Política de salida de todos los escenarios (si no, la de cada "
+             "escenario en el JSON, o full)"
+    )
+    parser.add_argument(
+        "--salida-cada", type=int,
+        help="Con --salida every_k, dibuja una generación cada K (más la última)"
+    )
     args = parser.parse_args()
-    main(args.config)
+    main(
+        args.config,
+        workers        = args.workers,
+        semilla_base   = args.semilla,
+        render_workers = args.render_workers,
+        gif_directo    = args.gif_directo or args.sin_png,
+        guardar_png    = not args.sin_png,
+        memoria_compartida = args.memoria_compartida,
+        mmap           = args.mmap,
+        checkpoint_cada = args.checkpoint_cada,
+        reanudar        = args.reanudar,
+        perfilar        = args.profile,
+        cprofile        = args.cprofile,
+        metricas        = not args.sin_metricas,
+        salida          = args.salida,
+        salida_cada     = args.salida_cada
+    )
@@ -0,0 +1,262 @@
+import os
+import glob
+import json
+import time
+import hashlib
+import contextlib
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+# junto a este módulo, no en el directorio actual: main/main.py (que se
+# corre desde main/) y el main.py de la raíz comparten la misma caché
+HEATMAP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "heatmaps")
+os.makedirs(HEATMAP_DIR, exist_ok=True)
+
+# =========================
+# Caché en disco por contenido
+# =========================
+# Cada heatmap generado se guarda como {clave}.npy, donde la clave es un
+# hash del generador y sus parámetros. manifiesto.json guarda, por clave,
+# el tamaño en disco y las fechas de creación y último acceso, y además
+# los nombres lógicos ("perlin_fina_perlin", ...) que apuntan a cada clave.
+# La pirámide de un mapa (ver piramide.py) se guarda al lado, como
+# {clave}.nivel1.npy, {clave}.nivel2.npy, ..., cuenta en su tamaño y se
+# borra con él.
+#
+# Todo lo que lee, modifica y reescribe el manifiesto lo hace con un lock
+# de archivo (manifiesto.lock), así dos procesos no se pisan las
+# entradas. El último acceso de un mapa no se guarda en el manifiesto en
+# cada carga: se marca en el atime del propio .npy (ver tocar) y se pasa
+# a "ultimo_acceso" cada vez que el manifiesto se reescribe (registrar,
+# actualizar_bytes, desalojos), así el campo queda al día por tandas.
+ARCHIVO_MANIFIESTO = "manifiesto.json"
+ARCHIVO_BLOQUEO = "manifiesto.lock"
+PRESUPUESTO_DISCO_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def configurar_disco(presupuesto_bytes, directorio=HEATMAP_DIR):
+    """Cambia el presupuesto en disco de la caché y desaloja lo que sobre."""
+    global PRESUPUESTO_DISCO_BYTES
+    PRESUPUESTO_DISCO_BYTES = presupuesto_bytes
+    with _bloqueado(directorio):
+        man = leer_manifiesto(directorio)
+        _desalojar(man, directorio)
+        _escribir_manifiesto(man, directorio)
+
+
+def _canonico(valor):
+    """Forma JSON estable de un parámetro (tuplas, dtypes, escalares numpy)."""
+    if isinstance(valor, (list, tuple)):
+        return [_canonico(v) for v in valor]
+    if isinstance(valor, dict):
+        return {str(k): _canonico(v) for k, v in valor.items()}
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, (type, np.dtype)):
+        return np.dtype(valor).name
+    return valor
+
+
+def clave_heatmap(tipo, size, params):
+    """Hash de (tipo, size, semilla, resto de parámetros)."""
+    params = dict(params)
+    contenido = {
+        "tipo":    tipo,
+        "size":    int(size),
+        "semilla": _canonico(params.pop("semilla", None)),
+        "params":  _canonico(params)
+    }
+    texto = json.dumps(contenido, sort_keys=True)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:20]
+
+
+def _ruta(directorio, archivo):
+    return os.path.join(directorio, archivo)
+
+
+def ruta_nivel(path, nivel):
+    """Archivo del nivel 'nivel' de la pirámide del mapa guardado en 'path'."""
+    return f"{os.path.splitext(path)[0]}.nivel{nivel}.npy"
+
+
+def rutas_niveles(path):
+    """Niveles de la pirámide de 'path' que hay en disco."""
+    rutas = glob.glob(f"{glob.escape(os.path.splitext(path)[0])}.nivel*.npy")
+    return [r for r in rutas if ".tmp" not in r]
+
+
+def _bytes_en_disco(path):
+    """Tamaño del mapa más el de su pirámide."""
+    return os.path.getsize(path) + sum(os.path.getsize(r) for r in rutas_niveles(path))
+
+
+def leer_manifiesto(directorio=HEATMAP_DIR):
+    path = _ruta(directorio, ARCHIVO_MANIFIESTO)
+    if not os.path.exists(path):
+        return {"entradas": {}, "nombres": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@contextlib.contextmanager
+def _bloqueado(directorio):
+    """Exclusión entre procesos para leer, modificar y reescribir el manifiesto."""
+    if fcntl is None:
+        yield
+        return
+    with open(_ruta(directorio, ARCHIVO_BLOQUEO), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _escribir_manifiesto(man, directorio):
+    # escritura atómica: nunca queda un manifiesto a medio escribir
+    _sincronizar_accesos(man, directorio)
+    path = _ruta(directorio, ARCHIVO_MANIFIESTO)
+    tmp  = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(man, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _ultimo_acceso(entrada, directorio):
+    """El más reciente entre el registrado y el atime del archivo."""
+    try:
+        atime = os.stat(_ruta(directorio, entrada["archivo"])).st_atime
+    except FileNotFoundError:
+        atime = 0.0
+    return max(entrada["ultimo_acceso"], atime)
+
+
+def _sincronizar_accesos(man, directorio):
+    """Pasa a "ultimo_acceso" los atime de los mapas (ver tocar)."""
+    for entrada in man["entradas"].values():
+        entrada["ultimo_acceso"] = _ultimo_acceso(entrada, directorio)
+
+
+def _desalojar(man, directorio, proteger=()):
+    """Borra los mapas de acceso más antiguo hasta entrar en el presupuesto."""
+    entradas = man["entradas"]
+    total = sum(e["bytes"] for e in entradas.values())
+    _sincronizar_accesos(man, directorio)
+    for clave in sorted(entradas, key=lambda c: entradas[c]["ultimo_acceso"]):
+        if total <= PRESUPUESTO_DISCO_BYTES:
+            break
+        if clave in proteger:
+            continue
+        entrada = entradas.pop(clave)
+        total -= entrada["bytes"]
+        path = _ruta(directorio, entrada["archivo"])
+        for archivo in [path] + rutas_niveles(path):
+            try:
+                os.remove(archivo)
+            except FileNotFoundError:
+                pass
+        man["nombres"] = {n: c for n, c in man["nombres"].items() if c != clave}
+
+
+def buscar(clave, nombres=(), directorio=HEATMAP_DIR):
+    """
+    Ruta del mapa con esa clave (o None si no está en la caché).
+    Actualiza su último acceso y lo asocia a los nombres lógicos dados.
+    """
+    man = leer_manifiesto(directorio)
+    entrada = man["entradas"].get(clave)
+    if entrada is None:
+        return None
+    path = _ruta(directorio, entrada["archivo"])
+    if not os.path.exists(path):
+        return None
+
+    tocar(path)
+    if any(man["nombres"].get(nombre) != clave for nombre in nombres):
+        with _bloqueado(directorio):
+            man = leer_manifiesto(directorio)
+            if clave in man["entradas"]:
+                for nombre in nombres:
+                    man["nombres"][nombre] = clave
+                _escribir_manifiesto(man, directorio)
+    return path
+
+
+def ruta_de(clave, directorio=HEATMAP_DIR):
+    """Archivo donde vive (o vivirá) el mapa con esa clave."""
+    return _ruta(directorio, f"{clave}.npy")
+
+
+def registrar(clave, nombres=(), descripcion=None, directorio=HEATMAP_DIR):
+    """
+    Registra en el manifiesto el mapa ya escrito en ruta_de(clave), con sus
+    nombres lógicos, y desaloja lo que exceda PRESUPUESTO_DISCO_BYTES.
+    """
+    path  = ruta_de(clave, directorio)
+    ahora = time.time()
+    with _bloqueado(directorio):
+        man = leer_manifiesto(directorio)
+        man["entradas"][clave] = {
+            "archivo":       os.path.basename(path),
+            "bytes":         _bytes_en_disco(path),
+            "creado":        ahora,
+            "ultimo_acceso": ahora,
+            "descripcion":   _canonico(descripcion or {})
+        }
+        for nombre in nombres:
+            man["nombres"][nombre] = clave
+        _desalojar(man, directorio, proteger=(clave,))
+        _escribir_manifiesto(man, directorio)
+    return path
+
+
+def guardar(clave, heatmap, nombres=(), descripcion=None, directorio=HEATMAP_DIR):
+    """Guarda el mapa como {clave}.npy y lo registra (ver registrar)."""
+    path = ruta_de(clave, directorio)
+    tmp  = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp, heatmap)
+    os.replace(tmp, path)
+    return registrar(clave, nombres, descripcion, directorio)
+
+
+def resolver_nombre(nombre, directorio=HEATMAP_DIR):
+    """Ruta del mapa al que apunta un nombre lógico, o None."""
+    man = leer_manifiesto(directorio)
+    clave = man["nombres"].get(nombre)
+    if clave is None or clave not in man["entradas"]:
+        return None
+    return _ruta(directorio, man["entradas"][clave]["archivo"])
+
+
+def tocar(path):
+    """
+    Marca como recién usado el mapa guardado en 'path' poniendo su atime
+    en ahora, sin reescribir el manifiesto. El mtime queda igual: la
+    pirámide lo usa para saber si sus niveles son más viejos que el mapa.
+    """
+    try:
+        st = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+    except OSError:
+        pass
+
+
+def actualizar_bytes(path, directorio=HEATMAP_DIR):
+    """
+    Vuelve a medir lo que ocupa en disco el mapa de 'path' (con su
+    pirámide) y desaloja otros mapas si se pasó del presupuesto.
+    """
+    archivo = os.path.basename(path)
+    with _bloqueado(directorio):
+        man = leer_manifiesto(directorio)
+        for clave, entrada in man["entradas"].items():
+            if entrada["archivo"] == archivo:
+                entrada["bytes"] = _bytes_en_disco(path)
+                _desalojar(man, directorio, proteger=(clave,))
+                _escribir_manifiesto(man, directorio)
+                return
@@ -0,0 +1,136 @@
+import os
+import csv
+
+import numpy as np
+
+METRICAS_DIR = "./metricas"
+
+# =========================
+# Métricas por generación
+# =========================
+# Columnas por defecto: (campo, encabezado). Los campos son los que calcula
+# RegistroMetricas.agregar; cada GA puede pedir otros encabezados u orden.
+COLUMNAS = (
+    ("generacion",    "generacion"),
+    ("min",           "fitness_min"),
+    ("max",           "fitness_max"),
+    ("media",         "fitness_media"),
+    ("std",           "fitness_std"),
+    ("diversidad",    "diversidad"),
+    ("celdas_unicas", "celdas_unicas"),
+    ("mejor",         "mejor"),
+)
+
+
+def diversidad(coords, max_exacto=2000, muestras=200_000, rng=None, bloque=1024):
+    """
+    Distancia media entre todos los pares de puntos de 'coords' (N,2).
+    Hasta max_exacto puntos es exacta (por bloques de filas); con más se
+    estima con 'muestras' pares al azar sacados de 'rng' (no del RNG del GA).
+    """
+    pts = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    n = len(pts)
+    if n < 2:
+        return 0.0
+    if n > max_exacto:
+        rng = rng if rng is not None else np.random.default_rng(0)
+        i = rng.integers(0, n, size=muestras)
+        j = (i + rng.integers(1, n, size=muestras)) % n  # j != i
+        return float(np.hypot(*(pts[i] - pts[j]).T).mean())
+    total = 0.0
+    for a in range(0, n, bloque):
+        d = pts[a:a + bloque, None, :] - pts[None, :, :]
+        total += np.sqrt((d * d).sum(axis=2)).sum()
+    return float(total / (n * (n - 1)))
+
+
+def celdas_unicas(coords):
+    """Cantidad de celdas distintas ocupadas."""
+    pts = np.asarray(coords).reshape(-1, 2)
+    return len(np.unique(pts, axis=0))
+
+
+class RegistroMetricas:
+    """
+    Estadísticas por generación a un CSV, con buffer: las filas se juntan
+    en memoria y se escriben de a 'cada' (y al volcar() o cerrar()), así
+    el archivo se abre una vez por lote y no una vez por generación.
+
+    - columnas: pares (campo, encabezado) en el orden del CSV.
+    - decimales: redondeo de los campos de fitness (None = sin redondear).
+    - desde: con desde > 0 se continúa un CSV existente, descartando las
+      filas de generaciones >= desde (las de una corrida que se cortó).
+    """
+
+    def __init__(self, path, columnas=COLUMNAS, cada=100, decimales=None, desde=0):
+        self.path = path
+        self.campos = [c for c, _ in columnas]
+        self.encabezados = [e for _, e in columnas]
+        self.cada = cada
+        self.decimales = decimales
+        self.filas = []
+        self._rng = np.random.default_rng(0)  # solo para estimar diversidad
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if desde > 0 and os.path.isfile(path):
+            self._recortar(desde)
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(self.encabezados)
+
+    def _recortar(self, desde):
+        path = self.path
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            filas = list(csv.reader(f))
+        i = self.campos.index("generacion")
+        filas = [filas[0]] + [r for r in filas[1:] if int(r[i]) < desde]
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(filas)
+        os.replace(tmp, path)
+
+    def agregar(self, generacion, fitness, coords, mejor=None):
+        """
+        Registra una generación. 'fitness' (N,) y 'coords' (N,2) o
+        (N,K,2) si cada individuo tiene K puntos; 'mejor' es lo que se
+        escribe como mejor individuo (por defecto, las coordenadas del de
+        mayor fitness).
+        """
+        fitness = np.asarray(fitness, dtype=np.float64)
+        coords = np.asarray(coords)
+        if mejor is None:
+            mejor = tuple(coords[int(np.argmax(fitness))].tolist())
+        valores = {
+            "generacion":    generacion,
+            "min":           float(fitness.min()),
+            "max":           float(fitness.max()),
+            "media":         float(fitness.mean()),
+            "std":           float(fitness.std()),
+            "diversidad":    diversidad(coords, rng=self._rng),
+            "celdas_unicas": celdas_unicas(coords),
+            "mejor":         str(mejor)
+        }
+        if self.decimales is not None:
+            for k in ("min", "max", "media", "std", "diversidad"):
+                valores[k] = round(valores[k], self.decimales)
+        self.filas.append([valores[c] for c in self.campos])
+        if len(self.filas) >= self.cada:
+            self.volcar()
+
+    def volcar(self):
+        """Escribe las filas pendientes de una vez."""
+        if not self.filas:
+            return
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(self.filas)
+        self.filas = []
+
+    def cerrar(self):
+        self.volcar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,117 @@
+import time
+import contextlib
+from collections import defaultdict
+
+# =========================
+# Instrumentación liviana
+# =========================
+# fase("cruce") cronometra un bloque y contar("distancias", n) suma a un
+# contador. Mientras no haya un Perfil activo (lo normal), fase() devuelve
+# un contexto vacío y contar() no hace nada, así que dejarlos en los
+# caminos calientes cuesta una llamada de función.
+_activo = None
+_NULO = contextlib.nullcontext()
+
+
+class Perfil:
+    """
+    Tiempos y contadores acumulados por fase, por generación y en total.
+    cerrar_generacion() devuelve lo de la generación en curso y lo suma
+    al total.
+    """
+
+    def __init__(self):
+        self.tiempos    = defaultdict(float)
+        self.llamadas   = defaultdict(int)
+        self.contadores = defaultdict(int)
+        self._gen_tiempos    = defaultdict(float)
+        self._gen_contadores = defaultdict(int)
+
+    def cerrar_generacion(self):
+        registro = {
+            "fases":      {k: round(v, 6) for k, v in self._gen_tiempos.items()},
+            "contadores": dict(self._gen_contadores)
+        }
+        for k, v in self._gen_tiempos.items():
+            self.tiempos[k] += v
+        for k, v in self._gen_contadores.items():
+            self.contadores[k] += v
+        self._gen_tiempos.clear()
+        self._gen_contadores.clear()
+        return registro
+
+    def resumen(self):
+        """Totales {"fases": {fase: (segundos, llamadas)}, "contadores": {...}}."""
+        self.cerrar_generacion()
+        return {
+            "fases":      {k: (self.tiempos[k], self.llamadas[k]) for k in self.tiempos},
+            "contadores": dict(self.contadores)
+        }
+
+
+class _Cronometro:
+    __slots__ = ("perfil", "nombre", "t0")
+
+    def __init__(self, perfil, nombre):
+        self.perfil = perfil
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.perfil._gen_tiempos[self.nombre] += time.perf_counter() - self.t0
+        self.perfil.llamadas[self.nombre] += 1
+
+
+def activar():
+    """Empieza a medir con un Perfil nuevo y lo devuelve."""
+    global _activo
+    _activo = Perfil()
+    return _activo
+
+
+def desactivar():
+    global _activo
+    _activo = None
+
+
+def fase(nombre):
+    """Contexto que suma su duración a la fase 'nombre' del perfil activo."""
+    if _activo is None:
+        return _NULO
+    return _Cronometro(_activo, nombre)
+
+
+def contar(nombre, n=1):
+    """Suma n al contador 'nombre' del perfil activo."""
+    if _activo is not None:
+        _activo._gen_contadores[nombre] += n
+
+
+def sumar_resumenes(resumenes):
+    """Junta los resúmenes de varios escenarios en uno."""
+    total = {"fases": {}, "contadores": {}}
+    for r in resumenes:
+        for k, (seg, n) in r["fases"].items():
+            s0, n0 = total["fases"].get(k, (0.0, 0))
+            total["fases"][k] = (s0 + seg, n0 + n)
+        for k, v in r["contadores"].items():
+            total["contadores"][k] = total["contadores"].get(k, 0) + v
+    return total
+
+
+def imprimir_resumen(resumen, titulo="Perfil"):
+    """Tabla de fases (ordenadas por tiempo) y contadores."""
+    fases = resumen["fases"]
+    # las subfases ("cruce.parejas") no suman al total
+    total = sum(seg for k, (seg, _) in fases.items() if "." not in k) or 1.0
+    print(f"{titulo}")
+    print(f"  {'Fase':<28} {'Total (s)':>10} {'%':>6} {'Llamadas':>9} {'Media (ms)':>11}")
+    for k, (seg, n) in sorted(fases.items(), key=lambda kv: -kv[1][0]):
+        media = 1000 * seg / n if n else 0.0
+        print(f"  {k:<28} {seg:>10.3f} {100 * seg / total:>5.1f}% {n:>9} {media:>11.3f}")
+    if resumen["contadores"]:
+        print(f"  {'Contador':<28} {'Total':>10}")
+        for k, v in sorted(resumen["contadores"].items()):
+            print(f"  {k:<28} {v:>10}")
@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from manifiesto import ruta_nivel, actualizar_bytes
+
+# =========================
+# Pirámide multirresolución
+# =========================
+# El nivel k+1 es el nivel k reducido a la mitad tomando el máximo de cada
+# bloque de 2x2 celdas: un pozo bueno no se pierde al bajar de resolución
+# y el valor de una celda gruesa es el mejor que hay debajo. Los niveles
+# se guardan junto al mapa base (ver manifiesto.ruta_nivel) y se calculan
+# por bandas de filas, así que un mapa de 16k x 16k se reduce sin cargarlo
+# entero en RAM. El último nivel es el primero de lado <= lado_min.
+LADO_MIN_PIRAMIDE = 256
+
+
+def reducir_max(origen, destino, filas_bloque=2048):
+    """
+    destino = máximo de cada bloque 2x2 de origen, por bandas de filas.
+    Con lados impares la última fila / columna forma un bloque sola.
+    """
+    filas_bloque += filas_bloque % 2
+    for a in range(0, origen.shape[0], filas_bloque):
+        bloque = np.asarray(origen[a:a + filas_bloque])
+        if len(bloque) % 2:
+            bloque = np.concatenate([bloque, bloque[-1:]])
+        if bloque.shape[1] % 2:
+            bloque = np.concatenate([bloque, bloque[:, -1:]], axis=1)
+        h, w = bloque.shape
+        destino[a // 2:a // 2 + h // 2] = bloque.reshape(h // 2, 2, w // 2, 2).max(axis=(1, 3))
+
+
+def construir_piramide(path, lado_min=LADO_MIN_PIRAMIDE, filas_bloque=2048):
+    """
+    Genera los niveles que falten (o sean más viejos que el mapa) de la
+    pirámide del mapa guardado en 'path' y devuelve sus rutas, empezando
+    por el propio mapa (nivel 0).
+    """
+    rutas  = [path]
+    origen = np.load(path, mmap_mode="r")
+    previo = os.path.getmtime(path)
+    nuevos = False
+    while max(origen.shape) > lado_min:
+        ruta = ruta_nivel(path, len(rutas))
+        if nuevos or not os.path.exists(ruta) or os.path.getmtime(ruta) < previo:
+            tmp = f"{ruta}.{os.getpid()}.tmp.npy"
+            forma = tuple((n + 1) // 2 for n in origen.shape)
+            destino = open_memmap(tmp, mode="w+", dtype=origen.dtype, shape=forma)
+            reducir_max(origen, destino, filas_bloque)
+            destino.flush()
+            del destino
+            os.replace(tmp, ruta)
+            nuevos = True
+        previo = os.path.getmtime(ruta)
+        rutas.append(ruta)
+        origen = np.load(ruta, mmap_mode="r")
+    if nuevos:
+        actualizar_bytes(path)
+    return rutas
+
+
+def cargar_piramide(path, mmap_mode="r", lado_min=LADO_MIN_PIRAMIDE):
+    """[mapa, nivel 1, nivel 2, ...] del mapa en 'path', de solo lectura."""
+    niveles = []
+    for ruta in construir_piramide(path, lado_min):
+        nivel = np.load(ruta, mmap_mode=mmap_mode)
+        nivel.flags.writeable = False
+        niveles.append(nivel)
+    return niveles
+
+
+def nivel_para(niveles, lado):
+    """El nivel más chico que todavía tiene al menos 'lado' celdas de lado."""
+    for nivel in reversed(niveles):
+        if max(nivel.shape) >= lado:
+            return nivel
+    return niveles[0]
+
+
+def refinar(coords, fino):
+    """
+    Pasa coordenadas (N,2) de un nivel al siguiente más fino: cada celda
+    gruesa se reemplaza por la celda de 'fino' con mayor valor de su
+    bloque de 2x2 (la que le dio su valor al reducir).
+    """
+    coords = np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+    desplazamientos = np.array([[0, 0], [0, 1], [1, 0], [1, 1]])
+    candidatas = 2 * coords[:, None, :] + desplazamientos[None, :, :]
+    candidatas = np.minimum(candidatas, np.array(fino.shape) - 1)
+    valores = np.asarray(fino[candidatas[..., 0], candidatas[..., 1]])
+    elegida = np.argmax(valores, axis=1)
+    return candidatas[np.arange(len(coords)), elegida]
+
+
+def a_escala_base(coords, nivel, size):
+    """Coordenadas de un nivel llevadas al mapa base (centro del bloque)."""
+    factor = 2 ** nivel
+    coords = np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+    return np.minimum(coords * factor + factor // 2, size - 1)
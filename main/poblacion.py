@@ -0,0 +1,108 @@
+import numpy as np
+
+# =========================
+# Población compacta
+# =========================
+class Poblacion:
+    """
+    Población de pozos en arrays paralelos:
+
+    - coords:  array (N,2) int64 con las coordenadas (x, y)
+    - fitness: array (N,) float64; NaN = todavía sin evaluar
+    - edad:    array (N,) int64 de generaciones vividas (opcional)
+
+    Iterarla o indexarla con un entero devuelve tuplas ((x, y), fitness)
+    como el formato de listas anterior, así que el código que todavía
+    recorre tuplas sigue funcionando. Para dibujar o calcular conviene usar
+    directamente 'coords', sin crear tuplas.
+    """
+
+    __slots__ = ("coords", "fitness", "edad")
+
+    def __init__(self, coords, fitness=None, edad=None):
+        self.coords = np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+        n = len(self.coords)
+        if fitness is None:
+            self.fitness = np.full(n, np.nan)
+        else:
+            self.fitness = np.asarray(fitness, dtype=np.float64).reshape(n)
+        if edad is None:
+            self.edad = np.zeros(n, dtype=np.int64)
+        else:
+            self.edad = np.asarray(edad, dtype=np.int64).reshape(n)
+
+    # ---- conversión desde / hacia el formato de tuplas ----
+    @classmethod
+    def desde(cls, poblacion):
+        """
+        Adaptador: acepta una Poblacion (se devuelve tal cual), un array
+        (N,2), una lista [(x,y), ...] o una lista [((x,y), fitness), ...]
+        (fitness None queda como NaN).
+        """
+        if isinstance(poblacion, cls):
+            return poblacion
+        if isinstance(poblacion, np.ndarray):
+            return cls(poblacion)
+        poblacion = list(poblacion)
+        if not poblacion:
+            return cls(np.empty((0, 2), dtype=np.int64))
+        if isinstance(poblacion[0][0], tuple):
+            coords  = [pt for pt, _ in poblacion]
+            fitness = [np.nan if f is None else f for _, f in poblacion]
+            return cls(coords, fitness)
+        return cls(poblacion)
+
+    def como_tuplas(self):
+        """Lista [((x, y), fitness), ...] con tipos de Python."""
+        return list(self)
+
+    # ---- vistas ----
+    def puntos(self):
+        """Lista [(x, y), ...] (solo para código que necesita tuplas)."""
+        return [tuple(p) for p in self.coords.tolist()]
+
+    # ---- protocolo de secuencia ----
+    def __len__(self):
+        return len(self.coords)
+
+    def __iter__(self):
+        for (x, y), f in zip(self.coords.tolist(), self.fitness.tolist()):
+            yield (x, y), (None if f != f else f)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            x, y = self.coords[idx].tolist()
+            f = float(self.fitness[idx])
+            return (x, y), (None if f != f else f)
+        return Poblacion(self.coords[idx], self.fitness[idx], self.edad[idx])
+
+    def __add__(self, otra):
+        otra = Poblacion.desde(otra)
+        return Poblacion(
+            np.concatenate([self.coords, otra.coords]),
+            np.concatenate([self.fitness, otra.fitness]),
+            np.concatenate([self.edad, otra.edad])
+        )
+
+    def __radd__(self, otra):
+        # lista de tuplas + Poblacion
+        return Poblacion.desde(otra) + self
+
+    def __repr__(self):
+        return f"Poblacion({len(self)} individuos)"
+
+    # ---- operaciones ----
+    def con_fitness(self, fitness):
+        """Misma población con otro fitness (no copia las coordenadas)."""
+        return Poblacion(self.coords, fitness, self.edad)
+
+    def ordenada(self):
+        """
+        Ordenada por fitness descendente. Es estable: ante empates conserva
+        el orden, igual que sorted(..., reverse=True).
+        """
+        return self[np.argsort(-self.fitness, kind="stable")]
+
+    def envejecer(self):
+        """Misma población con una generación más de edad."""
+        return Poblacion(self.coords, self.fitness, self.edad + 1)
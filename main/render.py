@@ -0,0 +1,186 @@
+import queue
+import itertools
+import traceback
+import multiprocessing as mp
+
+import numpy as np
+
+from cargarHeatMap import cargar_heatmap
+from espacial import como_array_coords
+from generarGif import generar_gif, abrir_gif
+
+# =========================
+# Trabajador de render
+# =========================
+def _trabajador(entrada, salida):
+    """
+    Recibe instantáneas de población y las convierte en frames.
+    Mantiene un LienzoConjuntos por heatmap: la figura y el imshow se
+    crean una vez y en cada frame solo se mueven los puntos.
+
+    Si la tarea trae un GIF destino, el frame se agrega directo a un
+    EscritorGif abierto (y el PNG solo se escribe si se pidió ruta).
+    "marcar_gif" guarda el estado de ese GIF para poder continuarlo.
+    """
+    import imageio.v2 as imageio
+    from visualizacion import LienzoConjuntos
+
+    lienzos    = {}
+    escritores = {}
+    while True:
+        tarea = entrada.get()
+        if tarea is None:
+            break
+        tipo, carpeta = tarea[0], tarea[1]
+        try:
+            if tipo == "cerrar_gif":
+                escritor = escritores.pop(carpeta, None)
+                if escritor is not None:
+                    escritor.cerrar()
+                salida.put(("ok", carpeta, None))
+                continue
+            if tipo == "marcar_gif":
+                escritor = escritores.get(carpeta)
+                if escritor is not None:
+                    escritor.marcar()
+                salida.put(("ok", carpeta, None))
+                continue
+
+            _, _, nombre_heatmap, size, conjuntos, ruta, gif = tarea
+            lienzo = lienzos.get((nombre_heatmap, size))
+            if lienzo is None:
+                heatmap = (
+                    cargar_heatmap(nombre_heatmap, mmap_mode="r") if nombre_heatmap else None
+                )
+                lienzo = LienzoConjuntos(size, n_conjuntos=len(conjuntos), heatmap=heatmap)
+                lienzos[(nombre_heatmap, size)] = lienzo
+
+            if gif is None:
+                lienzo.dibujar(conjuntos, ruta)
+            else:
+                frame = lienzo.rgba(conjuntos)
+                if ruta:
+                    imageio.imwrite(ruta, frame)
+                if carpeta not in escritores:
+                    escritores[carpeta] = abrir_gif(**gif)
+                escritores[carpeta].agregar(frame)
+            salida.put(("ok", carpeta, None))
+        except Exception:
+            salida.put(("error", carpeta, traceback.format_exc()))
+
+    for escritor in escritores.values():
+        escritor.cerrar()
+
+
+def instantanea(conjunto):
+    """Copia liviana (array int32 (N,2)) de una Poblacion o lista de puntos / ((x,y), f)."""
+    return np.array(como_array_coords(conjunto), dtype=np.int32).reshape(-1, 2)
+
+
+class PipelineRender:
+    """
+    Etapa de render en segundo plano.
+
+    El bucle del GA empuja instantáneas a colas acotadas (si se llenan,
+    enviar() espera: contrapresión) y un grupo de procesos las dibuja.
+
+    - Frames a PNG: se reparten entre los workers; el GIF de la carpeta se
+      arma recién cuando todos sus frames están escritos.
+    - Frames a GIF directo: todos los de una carpeta van al mismo worker,
+      que los agrega en orden a un EscritorGif abierto.
+    """
+
+    def __init__(self, workers=2, max_cola=16):
+        self.colas = [mp.Queue(maxsize=max(1, max_cola // workers)) for _ in range(workers)]
+        self.salida = mp.Queue()
+        self.procesos = [
+            mp.Process(target=_trabajador, args=(cola, self.salida), daemon=True)
+            for cola in self.colas
+        ]
+        for p in self.procesos:
+            p.start()
+
+        self._turno     = itertools.cycle(range(workers))
+        self.afinidad   = {}   # carpeta -> worker fijo (GIF directo)
+        self.pendientes = {}   # carpeta -> tareas sin confirmar
+        self.gifs       = {}   # carpeta -> kwargs de generar_gif
+        self.errores    = []
+
+    def _recibir(self, bloquear=True):
+        estado, carpeta, detalle = self.salida.get(block=bloquear)
+        self.pendientes[carpeta] -= 1
+        if estado == "error":
+            self.errores.append(detalle)
+
+    def _drenar(self):
+        while True:
+            try:
+                self._recibir(bloquear=False)
+            except queue.Empty:
+                return
+
+    def _completar(self, carpeta):
+        """Espera las tareas de 'carpeta' y genera su GIF pendiente."""
+        self.esperar(carpeta)
+        kwargs = self.gifs.pop(carpeta, None)
+        if kwargs is not None:
+            generar_gif(**kwargs)
+
+    def _encolar(self, carpeta, tarea, afin):
+        if afin and carpeta not in self.afinidad:
+            self.afinidad[carpeta] = next(self._turno)
+        w = self.afinidad.get(carpeta)
+        if w is None:
+            w = next(self._turno)
+        self.pendientes[carpeta] = self.pendientes.get(carpeta, 0) + 1
+        self.colas[w].put(tarea)
+
+    def enviar(self, carpeta, nombre_heatmap, size, conjuntos, ruta=None, gif=None):
+        """
+        Encola un frame. 'conjuntos' son listas de puntos o arrays (N,2).
+        gif: kwargs de abrir_gif para agregar el frame directo a ese GIF.
+        """
+        # un escenario nuevo en la misma carpeta no debe pisar un GIF pendiente
+        if carpeta in self.gifs:
+            self._completar(carpeta)
+        self._drenar()
+        tarea = (
+            "frame", carpeta, nombre_heatmap, size,
+            [instantanea(c) for c in conjuntos], ruta, gif
+        )
+        self._encolar(carpeta, tarea, afin=gif is not None)
+
+    def cerrar_gif(self, carpeta):
+        """Cierra el GIF directo de 'carpeta' después de su último frame."""
+        self._encolar(carpeta, ("cerrar_gif", carpeta), afin=True)
+
+    def marcar_gif(self, carpeta):
+        """Guarda el estado del GIF directo de 'carpeta' tras los frames ya enviados."""
+        self._encolar(carpeta, ("marcar_gif", carpeta), afin=True)
+
+    def esperar(self, carpeta):
+        """Espera a que estén escritos todos los frames enviados de 'carpeta'."""
+        while self.pendientes.get(carpeta, 0) > 0:
+            self._recibir()
+
+    def encolar_gif(self, carpeta, **kwargs):
+        """Programa generar_gif(**kwargs) para cuando terminen los frames de 'carpeta'."""
+        self.gifs[carpeta] = kwargs
+
+    def cerrar(self):
+        for cola in self.colas:
+            cola.put(None)
+        for carpeta in list(self.gifs):
+            self._completar(carpeta)
+        for carpeta in list(self.pendientes):
+            self._completar(carpeta)
+        for p in self.procesos:
+            p.join()
+        if self.errores:
+            raise RuntimeError("Fallo en el render:\n" + "\n".join(self.errores))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,360 @@
+import os
+import json
+import argparse
+
+import numpy as np
+
+from algoritmo import generar_pozos_equidistantes
+from cargarHeatMap import cargar_heatmap
+from fitness import fitness_con_penalizacion_replicas
+from espacial import vecinos_mas_cercanos
+
+# =========================
+# Motor de réplicas en lote
+# =========================
+# Evoluciona R réplicas independientes de un mismo escenario a la vez.
+# Cada población es un array (R, C, 2) de coordenadas enteras con su
+# fitness (R, C) y una máscara de válidos (R, C): las réplicas pueden tener
+# distinta cantidad de individuos (p. ej. tras la fusión de hijos), así que
+# se guardan con capacidad C común y los válidos siempre al principio.
+
+def _compactar(orden_clave, *arrays):
+    """Reordena cada fila de los arrays por orden_clave (orden estable)."""
+    orden = np.argsort(orden_clave, axis=1, kind="stable")
+    return [np.take_along_axis(a, orden[..., None] if a.ndim == 3 else orden, axis=1)
+            for a in arrays]
+
+
+def _ordenar_por_fitness(coords, fit, validos):
+    """Orden descendente por fitness (estable, como sorted(reverse=True)); inválidos al final."""
+    clave = np.where(validos, -fit, np.inf)
+    return _compactar(clave, coords, fit, validos)
+
+
+def _sortear_en_filas(pesos, u):
+    """
+    Para cada fila de 'pesos' (..., M) elige un índice con probabilidad
+    proporcional a su peso, usando los uniformes u (...).
+    """
+    acum = np.cumsum(pesos, axis=-1)
+    obj  = u * acum[..., -1]
+    return np.minimum((acum <= obj[..., None]).sum(axis=-1), pesos.shape[-1] - 1)
+
+
+def _parejas(metodo, sel, fsel, vsel, n_sel, rng, peso_fitness, peso_distancia, vecindad,
+             max_elementos=4_000_000):
+    """
+    Índice de la pareja de cada seleccionado, (R, S).
+
+    Solo ruleta_dist necesita todas las distancias: se calculan densas
+    (R, S, S) por bloques de réplicas de a lo sumo max_elementos celdas.
+    cercano usa la grilla de vecinos_mas_cercanos en cada réplica y
+    ruleta, la suma acumulada de los pesos de cada réplica.
+    """
+    R, S = vsel.shape
+    yo = np.broadcast_to(np.arange(S), (R, S))
+    siguiente = (yo + 1) % np.maximum(n_sel, 1)[:, None]
+
+    if metodo == "secuencial":
+        return siguiente
+
+    if metodo == "cercano":
+        idx = siguiente.copy()
+        for r in range(R):
+            if n_sel[r] >= 2:
+                idx[r, :n_sel[r]] = vecinos_mas_cercanos(sel[r, :n_sel[r]])
+        return idx
+
+    if metodo not in ("ruleta", "ruleta_dist"):
+        raise ValueError(f"Método desconocido: {metodo}")
+
+    pesos = np.where(vsel, np.maximum(fsel, 1e-6) ** peso_fitness, 0.0)
+    u = rng.random((R, S))
+
+    if metodo == "ruleta":
+        # como muestrear_parejas_ruleta: se sortea en [0, total - w_i) y,
+        # si cae a partir del tramo propio, se salta por encima de él
+        acum   = np.cumsum(pesos, axis=1)
+        inicio = acum - pesos
+        obj = u * (acum[:, -1:] - pesos)
+        obj = np.where(obj >= inicio, obj + pesos, obj)
+        idx = np.stack([np.searchsorted(acum[r], obj[r], side="right") for r in range(R)])
+        idx = np.minimum(idx, S - 1)
+    else:
+        idx = np.empty((R, S), dtype=np.int64)
+        ajenos = ~np.eye(S, dtype=bool)[None]
+        paso = max(1, max_elementos // (S * S))
+        for a in range(0, R, paso):
+            b = min(R, a + paso)
+            dx = (sel[a:b, :, None, 0] - sel[a:b, None, :, 0]).astype(np.float64)
+            dy = (sel[a:b, :, None, 1] - sel[a:b, None, :, 1]).astype(np.float64)
+            d = np.sqrt(dx * dx + dy * dy)
+            w = np.where(ajenos, pesos[a:b, None, :], 0.0)
+            w *= (1.0 / (1.0 + d)) ** peso_distancia
+            if vecindad is not None:
+                cerca = np.where(d < vecindad, w, 0.0)
+                con_vecinos = cerca.sum(axis=2) > 0
+                w = np.where(con_vecinos[..., None], cerca, w)
+            idx[a:b] = _sortear_en_filas(w, u[a:b])
+
+    # salvaguarda ante redondeos: nunca consigo mismo ni con un inválido
+    malo = (idx == yo) | ~np.take_along_axis(vsel, idx, axis=1)
+    return np.where(malo, siguiente, idx)
+
+
+def _centro(p1, f1, p2, f2, tipo_centro):
+    """Centro geométrico o de masa (con caída al geométrico si f1+f2 ~ 0)."""
+    geometrico = (p1 + p2) / 2.0
+    if tipo_centro == "geometrico":
+        return geometrico
+    if tipo_centro != "masa":
+        raise ValueError(f"Tipo de centro desconocido: {tipo_centro}")
+    den = (f1 + f2)[..., None]
+    chico = np.abs(den) < 1e-8
+    masa = (p1 * f1[..., None] + p2 * f2[..., None]) / np.where(chico, 1.0, den)
+    return np.where(chico, geometrico, masa)
+
+
+def _fusionar(hijos, fh, vh, size, penal_max, evaluar):
+    """
+    Fusión por penalización de cruce_interno_centro, en lote.
+
+    Con penal_max > 0 dos hijos solo alcanzan penal_max si caen en la
+    misma celda; el recorrido voraz los une de a pares (1º con 2º, 3º con
+    4º, ...), así que de cada celda repetida sobreviven los de rango par.
+    Con penal_max <= 0 la condición se cumple siempre y cada hijo se une
+    con el siguiente libre: pares consecutivos, en su centro de masa.
+    """
+    R, S = vh.shape
+    if penal_max > 0:
+        celda = hijos[..., 0] * size + hijos[..., 1]
+        celda = np.where(vh, celda, -1 - np.arange(S))        # inválidos: celdas únicas
+        orden = np.argsort(celda, axis=1, kind="stable")
+        ordenadas = np.take_along_axis(celda, orden, axis=1)
+        inicio = np.ones((R, S), dtype=bool)
+        inicio[:, 1:] = ordenadas[:, 1:] != ordenadas[:, :-1]
+        pos = np.broadcast_to(np.arange(S), (R, S))
+        rango_ord = pos - np.maximum.accumulate(np.where(inicio, pos, 0), axis=1)
+        rango = np.empty_like(rango_ord)
+        np.put_along_axis(rango, orden, rango_ord, axis=1)
+        return hijos, fh, vh & (rango % 2 == 0)
+
+    # pares consecutivos entre los válidos (que están al principio)
+    n = vh.sum(axis=1)[:, None]
+    pos = np.arange(S)[None, :]
+    primero = (pos % 2 == 0) & (pos + 1 < n)
+    companero = np.minimum(pos + 1, S - 1)
+    p2 = np.take_along_axis(hijos, np.broadcast_to(companero, (R, S))[..., None], axis=1)
+    f2 = np.take_along_axis(fh, np.broadcast_to(companero, (R, S)), axis=1)
+
+    centro = _centro(hijos.astype(np.float64), fh, p2.astype(np.float64), f2, "masa")
+    centro = np.clip(np.rint(centro), 0, size - 1).astype(hijos.dtype)
+    hijos = np.where(primero[..., None], centro, hijos)
+    fh = np.where(primero, evaluar(hijos, vh), fh)
+    segundo = (pos % 2 == 1) & (pos < n)
+    return hijos, fh, vh & ~segundo
+
+
+def _elegir_poblacion(cand, fc, vc, puntos, elitismo, aleatorio, rng):
+    """seleccionar_poblacion en lote: élite + resto por ruleta o por orden."""
+    cand, fc, vc = _ordenar_por_fitness(cand, fc, vc)
+    R, C = vc.shape
+    cnt = vc.sum(axis=1)
+    m = np.minimum(elitismo, cnt) if elitismo > 0 else np.zeros(R, dtype=np.int64)
+    capacidad = max(puntos, int(m.max()) if R else 0)
+    pos = np.arange(capacidad)[None, :]
+
+    if not aleatorio:
+        tam = np.maximum(m, np.minimum(puntos, cnt))
+        idx = np.broadcast_to(np.minimum(pos, C - 1), (R, capacidad))
+        validos = pos < tam[:, None]
+    else:
+        k = np.maximum(0, puntos - m)
+        resto = np.arange(C)[None, :] >= m[:, None]
+        w = np.where(vc & resto, np.maximum(fc, 0.0001), 0.0)
+        acum = np.cumsum(w, axis=1)
+        total = acum[:, -1]
+        # ruleta con reposición: búsqueda binaria sobre las filas apiladas
+        norm = acum / np.where(total > 0, total, 1.0)[:, None] + np.arange(R)[:, None]
+        u = rng.random((R, capacidad)) + np.arange(R)[:, None]
+        elegido = np.searchsorted(norm.ravel(), u.ravel(), side="right").reshape(R, capacidad)
+        elegido = np.clip(elegido - (np.arange(R) * C)[:, None], 0, C - 1)
+        elegido = np.maximum(elegido, np.minimum(m, C - 1)[:, None])
+
+        idx = np.where(pos < m[:, None], np.minimum(pos, C - 1), elegido)
+        validos = (pos < m[:, None]) | ((pos < (m + k)[:, None]) & (total > 0)[:, None])
+
+    coords = np.take_along_axis(cand, idx[..., None], axis=1)
+    return coords, validos
+
+
+def _poblacion_inicial(cfg, size, replicas, rng):
+    puntos = cfg["puntos"]
+    if cfg["modo"] == "equidistantes":
+        pozos, _ = generar_pozos_equidistantes(
+            num_pozos     = puntos,
+            grid_size     = size,
+            fitness_fn    = lambda p: 0.0,
+            distancia_min = cfg["distancia_min"]
+        )
+        coords = np.broadcast_to(np.array(pozos, dtype=np.int64), (replicas, len(pozos), 2))
+        return coords.copy(), np.ones((replicas, len(pozos)), dtype=bool)
+
+    if puntos > size * size:
+        raise ValueError("Más pozos que celdas disponibles.")
+    celdas = np.stack([rng.choice(size * size, puntos, replace=False) for _ in range(replicas)])
+    coords = np.stack([celdas // size, celdas % size], axis=-1)
+    return coords, np.ones((replicas, puntos), dtype=bool)
+
+
+def evolucionar_replicas(cfg, heatmap, replicas, semilla=0, guardar_historial=False,
+                         estado=None, generaciones=None):
+    """
+    Evoluciona 'replicas' réplicas independientes del escenario cfg (mismo
+    formato que los JSON de main.py: metodo, tipo_centro, elitismo,
+    aleatorio, jitter, ...) con un único Generator sembrado con 'semilla'.
+
+    - generaciones: total a alcanzar (por defecto cfg["generaciones"])
+    - estado:       el "estado" de una llamada anterior para seguir esas
+                    mismas réplicas desde donde quedaron (el resultado es
+                    el mismo que evolucionarlas de una vez)
+
+    Devuelve un dict con las trayectorias por réplica:
+      - mejor, promedio, peor: (R, G) fitness de la población en cada una
+        de las G generaciones corridas en esta llamada (tras recalcular su
+        penalización)
+      - mejor_crudo, promedio_crudo: (R, G) valor del heatmap, sin
+        penalización, del mejor individuo y medio de la población; sirven
+        para comparar escenarios con distinta penalización
+      - poblacion, fitness, validos: población final (R, C, 2), (R, C), (R, C)
+      - historial: lista de (coords, validos) por generación si guardar_historial
+      - estado: lo necesario para continuar (población, Generator y generación)
+    """
+    size = heatmap.shape[0]
+    if generaciones is None:
+        generaciones = cfg["generaciones"]
+
+    puntos       = cfg["puntos"]
+    jitter       = cfg["jitter"]
+    porc_sel     = cfg["porcentaje_seleccion"]
+    num_sel      = cfg["num_seleccionados"]
+    dist_min     = cfg["distancia_min"]
+    penal_max    = cfg["penalizacion_max"]
+    vecindad     = cfg.get("vecindad")
+
+    if estado is None:
+        rng  = np.random.default_rng(semilla)
+        gen0 = 0
+        pob, val = _poblacion_inicial(cfg, size, replicas, rng)
+    else:
+        rng  = estado["rng"]
+        gen0 = estado["generacion"]
+        pob, val = estado["poblacion"], estado["validos"]
+        replicas = len(pob)
+    corridas = max(0, generaciones - gen0)
+    mejor    = np.empty((replicas, corridas))
+    promedio = np.empty((replicas, corridas))
+    peor     = np.empty((replicas, corridas))
+    mejor_crudo    = np.empty((replicas, corridas))
+    promedio_crudo = np.empty((replicas, corridas))
+    historial = []
+
+    for i, gen in enumerate(range(gen0, generaciones)):
+        # Recalcular fitness contra la propia población y ordenar
+        fit = fitness_con_penalizacion_replicas(pob, val, heatmap, pob, val, dist_min, penal_max)
+        pob, fit, val = _ordenar_por_fitness(pob, fit, val)
+
+        cnt = val.sum(axis=1)
+        mejor[:, i]    = fit[:, 0]
+        promedio[:, i] = np.where(val, fit, 0.0).sum(axis=1) / np.maximum(cnt, 1)
+        peor[:, i]     = np.where(val, fit, np.inf).min(axis=1)
+        crudo = np.asarray(heatmap[pob[..., 0], pob[..., 1]], dtype=np.float64)
+        mejor_crudo[:, i]    = crudo[:, 0]
+        promedio_crudo[:, i] = np.where(val, crudo, 0.0).sum(axis=1) / np.maximum(cnt, 1)
+        if guardar_historial:
+            historial.append((pob.copy(), val.copy()))
+
+        # Selección
+        if porc_sel < 100:
+            n_sel = np.maximum(2, (cnt * porc_sel / 100).astype(np.int64))
+        else:
+            n_sel = np.minimum(num_sel, cnt)
+        S = int(n_sel.max())
+        sel, fsel = pob[:, :S], fit[:, :S]
+        vsel = np.arange(S)[None, :] < n_sel[:, None]
+
+        def evaluar(pts, validos):
+            return fitness_con_penalizacion_replicas(
+                pts, validos, heatmap, sel, vsel, dist_min, penal_max
+            )
+
+        # Cruce interno: pareja, centro, jitter y redondeo
+        parejas = _parejas(
+            cfg["metodo"], sel, fsel, vsel, n_sel, rng,
+            peso_fitness=1.0, peso_distancia=2.0, vecindad=vecindad
+        )
+        p2 = np.take_along_axis(sel, parejas[..., None], axis=1)
+        f2 = np.take_along_axis(fsel, parejas, axis=1)
+        # los lugares sin seleccionado (réplicas con menos de S) no tienen
+        # fitness finito: su centro sale NaN y se reemplaza por el punto
+        with np.errstate(invalid="ignore"):
+            centro = _centro(sel.astype(np.float64), fsel, p2.astype(np.float64), f2, cfg["tipo_centro"])
+        centro = np.where(vsel[..., None], centro, sel)
+        if jitter > 0:
+            centro += rng.uniform(-jitter, jitter, centro.shape)
+        hijos = np.clip(np.rint(centro), 0, size - 1).astype(pob.dtype)
+        fh = evaluar(hijos, vsel)
+
+        # Fusión por penalización
+        hijos, fh, vh = _fusionar(hijos, fh, vsel, size, penal_max, evaluar)
+
+        # Siguiente población entre seleccionados + hijos
+        cand = np.concatenate([sel, hijos], axis=1)
+        fc   = np.concatenate([fsel, fh], axis=1)
+        vc   = np.concatenate([vsel, vh], axis=1)
+        pob, val = _elegir_poblacion(
+            cand, fc, vc, puntos, cfg["elitismo"], cfg["aleatorio"], rng
+        )
+
+    # el estado guarda la población sin reordenar: así seguir después da
+    # exactamente lo mismo que no haber cortado
+    continuar = dict(poblacion=pob, validos=val, rng=rng, generacion=max(gen0, generaciones))
+    fit = fitness_con_penalizacion_replicas(pob, val, heatmap, pob, val, dist_min, penal_max)
+    pob, fit, val = _ordenar_por_fitness(pob, fit, val)
+    return dict(
+        mejor     = mejor,
+        promedio  = promedio,
+        peor      = peor,
+        mejor_crudo    = mejor_crudo,
+        promedio_crudo = promedio_crudo,
+        poblacion = pob,
+        fitness   = fit,
+        validos   = val,
+        historial = historial if guardar_historial else None,
+        estado    = continuar
+    )
+
+
+def main(config_path, replicas=100, semilla=0):
+    with open(config_path, 'r', encoding='utf-8') as f:
+        escenarios = json.load(f)
+
+    print(f"{'#':>3}  {'Escenario':<40} {'Mejor final (media ± desv)':>28}")
+    for indice, cfg in enumerate(escenarios):
+        heatmap = cargar_heatmap(cfg["nombre"], mmap_mode="r")
+        res = evolucionar_replicas(cfg, heatmap, replicas, semilla=semilla + indice)
+        final = res["mejor"][:, -1]
+        print(f"{indice:>3}  {cfg['nombre']:<40} {final.mean():>18.4f} ± {final.std():.4f}")
+
+    print(f"✅ {replicas} réplicas por escenario de {os.path.basename(config_path)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Evoluciona muchas réplicas de cada escenario a la vez para medir su varianza"
+    )
+    parser.add_argument("config", help="Ruta al JSON de escenarios")
+    parser.add_argument("--replicas", type=int, default=100, help="Réplicas por escenario")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla base")
+    args = parser.parse_args()
+    main(args.config, replicas=args.replicas, semilla=args.semilla)
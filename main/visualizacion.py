@@ -1,6 +1,8 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from espacial import como_array_coords
+
 def mostrar_varios_conjuntos(
     lista_coords,
     size,
@@ -69,3 +71,86 @@ def mostrar_varios_conjuntos(
         )
 
     plt.close(fig)
+
+
+class LienzoConjuntos:
+    """
+    Figura reutilizable con el mismo aspecto que mostrar_varios_conjuntos.
+
+    El heatmap se dibuja una sola vez al crear el lienzo; cada llamada a
+    dibujar() solo actualiza las posiciones de los scatter y guarda el
+    frame. Usa Figure + FigureCanvasAgg directamente (sin pyplot), así que
+    cada hilo o proceso puede tener su propio lienzo.
+    """
+
+    def __init__(self, size, n_conjuntos=2, colores=None, heatmap=None, dpi=100):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.size = size
+        self.dpi  = dpi
+        self.fig  = Figure(figsize=(6, 6))
+        FigureCanvasAgg(self.fig)
+        ax = self.fig.add_subplot(1, 1, 1)
+
+        if heatmap is not None:
+            ax.imshow(
+                np.array(heatmap),
+                cmap='RdYlGn_r',
+                origin='upper',
+                extent=(-0.5, size - 0.5, size - 0.5, -0.5)
+            )
+
+        if colores is None:
+            cmap    = plt.get_cmap('tab10', n_conjuntos)
+            colores = [cmap(i) for i in range(n_conjuntos)]
+
+        self.scatters = [
+            ax.scatter(
+                np.empty(0), np.empty(0),
+                c=[color],
+                edgecolors='black',
+                s=80
+            )
+            for color in colores
+        ]
+
+        ax.set_xlim(-0.5, size - 0.5)
+        ax.set_ylim(size - 0.5, -0.5)
+        ax.invert_yaxis()
+        ax.axis('off')
+
+        self.fig.subplots_adjust(left=0, right=1, top=1, bottom=0)
+        self.fig.patch.set_alpha(0)
+
+        # el recorte 'tight' no depende de los puntos: se calcula una vez
+        self._bbox = None
+
+    def actualizar(self, lista_coords):
+        """Mueve los scatter a las nuevas coordenadas (Poblacion, arrays (N,2) o tuplas)."""
+        for sc, coords in zip(self.scatters, lista_coords):
+            pts = como_array_coords(coords)
+            # se dibuja (y, x) como en mostrar_varios_conjuntos
+            sc.set_offsets(pts[:, ::-1])
+
+    def rgba(self, lista_coords):
+        """
+        Dibuja el frame en memoria y devuelve una copia RGBA (alto, ancho, 4).
+        Como la figura no tiene márgenes, coincide con el PNG de dibujar().
+        """
+        self.actualizar(lista_coords)
+        self.fig.canvas.draw()
+        return np.array(self.fig.canvas.buffer_rgba())
+
+    def dibujar(self, lista_coords, guardar_como):
+        self.actualizar(lista_coords)
+        if self._bbox is None:
+            self._bbox = self.fig.get_tightbbox(
+                self.fig.canvas.get_renderer()
+            )
+        self.fig.savefig(
+            guardar_como,
+            dpi=self.dpi,
+            bbox_inches=self._bbox,
+            pad_inches=0
+        )
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+import barrido
+
+
+def test_penalizacion_no_decide_el_escalon(monkeypatch):
+    """
+    Dos escenarios que solo difieren en penalizacion_max sobre el mismo
+    mapa tienen puntajes crudos parecidos: ambos pasan el primer escalón
+    frente a los del mapa peor, aunque con penalización su fitness sea menor.
+    """
+    bueno = np.random.default_rng(0).random((128, 128))
+    mapas = {"bueno": bueno, "malo": 0.9 * bueno}
+    monkeypatch.setattr(barrido, "cargar_heatmap", lambda nombre, mmap_mode=None: mapas[nombre])
+
+    base = dict(
+        modo="aleatorio", puntos=40, generaciones=8, jitter=2, porcentaje_seleccion=50,
+        num_seleccionados=20, distancia_min=4, metodo="ruleta", tipo_centro="masa",
+        elitismo=5, aleatorio=False
+    )
+    escenarios = [
+        dict(base, nombre=nombre, penalizacion_max=penal)
+        for nombre in ("bueno", "malo") for penal in (0.0, 0.4)
+    ]
+    tabla = barrido.barrer(escenarios, eta=2, gen_min=4, gen_max=8, rep_min=4, rep_max=8)
+    pasaron = {(f["escenario"]["nombre"], f["escenario"]["penalizacion_max"])
+               for f in tabla if f["escalon"] >= 1}
+    assert pasaron == {("bueno", 0.0), ("bueno", 0.4)}
+
@@ -0,0 +1,41 @@
+import os
+import sys
+import importlib.util
+
+import numpy as np
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+sys.path.insert(0, MAIN_DIR)
+from poblacion import Poblacion
+
+# main/main.py se carga por ruta: "main" choca con el main.py de la raíz
+_spec = importlib.util.spec_from_file_location("runner", os.path.join(MAIN_DIR, "main.py"))
+runner = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(runner)
+
+
+def test_envejecer():
+    pob = Poblacion([(0, 0), (1, 1)], [1.0, 2.0], [0, 3])
+    assert pob.envejecer().edad.tolist() == [1, 4]
+    assert (pob.envejecer() + Poblacion([(2, 2)])).edad.tolist() == [1, 4, 0]
+
+
+def test_sobrevivientes_envejecen(tmp_path):
+    """Con élite y truncamiento los mejores sobreviven y su edad crece por generación."""
+    generaciones = 6
+    cfg = dict(
+        nombre="prueba", modo="aleatorio", puntos=20, generaciones=generaciones, jitter=0,
+        porcentaje_seleccion=100, num_seleccionados=10, distancia_min=2,
+        penalizacion_max=0.5, metodo="cercano", tipo_centro="masa",
+        elitismo=5, aleatorio=False
+    )
+    heatmap = np.random.default_rng(0).random((64, 64))
+    checkpoint = str(tmp_path / "prueba.npz")
+    runner.ejecutar_escenario(
+        cfg, "prueba", str(tmp_path / "img"), str(tmp_path / "gif"), semilla=1,
+        heatmap=heatmap, checkpoint=checkpoint, checkpoint_cada=1, salida="none"
+    )
+    with np.load(checkpoint) as datos:
+        edad = datos["edad"]
+    assert edad.max() >= 2
+    assert edad.max() <= generaciones
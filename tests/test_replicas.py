@@ -0,0 +1,33 @@
+import os
+import sys
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+from replicas import evolucionar_replicas
+
+
+def test_replicas_con_menos_seleccionados():
+    """
+    Con penalización > 0 la fusión deja réplicas de distinto tamaño: las
+    que tienen menos seleccionados que el ancho del lote no deben generar
+    centros NaN ni hijos fuera del mapa.
+    """
+    heatmap = np.random.default_rng(0).random((64, 64))
+    cfg = dict(
+        nombre="prueba", modo="aleatorio", puntos=30, generaciones=15, jitter=0,
+        porcentaje_seleccion=50, num_seleccionados=10, distancia_min=3,
+        penalizacion_max=0.4, metodo="ruleta", tipo_centro="masa",
+        elitismo=0, aleatorio=False
+    )
+    for semilla in range(5):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            res = evolucionar_replicas(cfg, heatmap, 8, semilla=semilla, guardar_historial=True)
+
+        # el caso que se quiere cubrir: réplicas con distinta cantidad de individuos
+        assert any(len(set(val.sum(axis=1))) > 1 for _, val in res["historial"])
+        assert np.isfinite(res["mejor"]).all()
+        validos = res["poblacion"][res["validos"]]
+        assert ((validos >= 0) & (validos < heatmap.shape[0])).all()